@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+
+def get_token_cache_key(key):
+    return 'api:token:%s' % key
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication keeping the resolved tokens in the cache for
+    ``API_TOKEN_CACHE_TIMEOUT`` seconds, so that authenticated requests don't
+    query the database. Cached tokens are invalidated when the token is
+    deleted or the user is saved (see ``apps.api.models``).
+    """
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        credentials = cache.get(cache_key)
+
+        if credentials is None:
+            # Invalid tokens and inactive users raise AuthenticationFailed, so
+            # only valid credentials are cached
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials,
+                      settings.API_TOKEN_CACHE_TIMEOUT)
+
+        return credentials
+
+
+def invalidate_token(key):
+    cache.delete(get_token_cache_key(key))
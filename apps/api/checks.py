@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Cache backends that are either local to a process or backed by a database
+# query, see check_shared_cache
+UNSUITABLE_CACHE_BACKENDS = (
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register('caches')
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Check that the default cache is shared by the processes and kept in
+    memory (eg. memcached or redis): cached API tokens, primary pins and
+    prediction versions are invalidated through it, and are only worth
+    caching if reading them doesn't query the database.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+
+    if backend in UNSUITABLE_CACHE_BACKENDS:
+        return [Error(
+            "The %s cache backend isn't shared in memory by the processes."
+            % backend,
+            hint="Set the CACHE_BACKEND and CACHE_LOCATION environment"
+                 " variables to a memcached or redis cache.",
+            id='api.E001',
+        )]
+
+    return []
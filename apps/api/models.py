@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import checks  # NOQA
+from .authentication import invalidate_token
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user_tokens(sender, instance, created, **kwargs):
+    # The cached token holds a copy of the user, which would otherwise stay
+    # valid after it gets deactivated
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list('key',
+                                                                   flat=True):
+            invalidate_token(key)
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pagination on the primary key, which is unique and indexed on every
+    table so that each page is fetched with a single bounded query. The page
+    size can be changed with the ``per_page`` query string parameter.
+    """
+    ordering = '-id'
+    page_size_query_param = 'per_page'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
@@ -5,8 +5,8 @@ from ..game.models import Competition, Game, Score
 
 
 class ScoreSerializer(serializers.ModelSerializer):
-    player_name = serializers.ReadOnlyField(source='get_player_name')
-    player_avatar = serializers.ReadOnlyField(source='get_player_avatar')
+    player_name = serializers.ReadOnlyField(source='player.profile.get_full_name')
+    player_avatar = serializers.ReadOnlyField(source='player.profile.avatar')
     player_id = serializers.ReadOnlyField()
 
     class Meta:
@@ -39,6 +39,7 @@ class GameSerializer(serializers.Serializer):
             'winner_id': obj.winner_id,
             'loser_id': obj.loser_id,
             'competition_id': obj.competition_id,
+            'is_scored': obj.is_scored,
         }
 
     def create(self, validated_data):
@@ -1,8 +1,14 @@
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.test import APITestCase
 
 from ..game.tests.factories import UserFactory, CompetitionFactory
+from .authentication import CachedTokenAuthentication
+from .checks import check_shared_cache
 from rankme.tests import RankMeTestCase
 
 
@@ -24,6 +30,274 @@ class CompetitionListTests(APITestCase, RankMeTestCase):
         test_route(self, 'competition-list')
 
 
+def count_queries(self, url):
+    with CaptureQueriesContext(connection) as context:
+        response = self.client.get(url)
+
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    return len(context)
+
+
+class CompetitionQueriesTests(APITestCase, RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(UserFactory())
+
+    def add_competition_with_games(self):
+        competition = CompetitionFactory()
+        players = [UserFactory() for _ in range(3)]
+        competition.add_game(players[0], players[1])
+        competition.add_game(players[1], players[2])
+
+        return competition
+
+    def test_list_competitions_runs_constant_number_of_queries(self):
+        self.add_competition_with_games()
+        url = reverse('competition-list')
+        nb_queries = count_queries(self, url)
+
+        for _ in range(3):
+            self.add_competition_with_games()
+
+        self.assertEqual(count_queries(self, url), nb_queries)
+
+    def test_leaderboard_runs_two_queries(self):
+        competition = self.add_competition_with_games()
+        url = reverse('competition-leaderboard', kwargs={'pk': competition.pk})
+
+        # One for the ranking order of the competition, one for the ranks
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual([row['rank'] for row in response.data], [1, 2, 3])
+        self.assertEqual(
+            set(response.data[0].keys()),
+            {'rank', 'player_id', 'name', 'mu', 'sigma'}
+        )
+
+    def test_leaderboard_limit_is_clamped(self):
+        competition = self.add_competition_with_games()
+        url = reverse('competition-leaderboard', kwargs={'pk': competition.pk})
+
+        response = self.client.get(url, {'limit': -1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(url, {'offset': 1, 'limit': 10 ** 12})
+        self.assertEqual([row['rank'] for row in response.data], [2, 3])
+
+    def test_leaderboard_of_unknown_competition_returns_404(self):
+        url = reverse('competition-leaderboard', kwargs={'pk': 4242})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ListEndpointsTests(APITestCase, RankMeTestCase):
+    LIST_ROUTES = ('competition-list', 'user-list', 'game-list', 'score-list')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(UserFactory())
+
+        self.competitions = [CompetitionFactory() for _ in range(2)]
+        self.players = [UserFactory() for _ in range(3)]
+
+        for competition in self.competitions:
+            competition.add_game(self.players[0], self.players[1])
+            competition.add_game(self.players[1], self.players[2])
+
+    def get_results(self, route, **params):
+        response = self.client.get(reverse(route), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data['results']
+
+    def get_selects(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response, [query['sql'] for query in context.captured_queries
+                          if query['sql'].startswith('SELECT')]
+
+    def test_list_endpoints_dont_run_unbounded_queries(self):
+        for route in self.LIST_ROUTES:
+            response, selects = self.get_selects(reverse(route), per_page=1)
+            page_query, prefetch_queries = selects[0], selects[1:]
+
+            # The page is read from the id index and cut by a LIMIT, the
+            # related objects are only fetched for the ids of the page
+            self.assertRegex(page_query,
+                             r'ORDER BY "\w+"\."id" DESC LIMIT \d+$')
+            for sql in prefetch_queries:
+                self.assertRegex(sql, r'"\w+"\."\w+" IN \([\d, ]+\)$')
+
+            # The next pages start after the last id of the previous one
+            last_id = response.data['results'][-1]['id']
+            _, selects = self.get_selects(response.data['next'])
+            self.assertRegex(
+                selects[0],
+                r'WHERE .*"\w+"\."id" < %d .*LIMIT \d+$' % last_id
+            )
+
+    def test_list_endpoints_are_paginated(self):
+        games = self.get_results('game-list', per_page=1)
+        self.assertEqual(len(games), 1)
+
+    def test_filter_games_by_competition(self):
+        games = self.get_results('game-list',
+                                 competition=self.competitions[0].id)
+        self.assertEqual(len(games), 2)
+        self.assertEqual({game['competition_id'] for game in games},
+                         {self.competitions[0].id})
+
+    def test_filter_games_by_player(self):
+        games = self.get_results('game-list', player=self.players[2].id)
+        self.assertEqual(len(games), 2)
+
+    def test_filter_games_by_date(self):
+        games = self.get_results('game-list', since='2100-01-01')
+        self.assertEqual(games, [])
+
+    def test_filter_games_after_id(self):
+        last_game = self.competitions[1].games.order_by('-id').first()
+        games = self.get_results('game-list', after_id=last_game.id - 1)
+        self.assertEqual([game['id'] for game in games], [last_game.id])
+
+    def test_filter_scores_by_competition_and_player(self):
+        scores = self.get_results('score-list',
+                                  competition=self.competitions[0].id,
+                                  player=self.players[0].id)
+        self.assertEqual(len(scores), 1)
+
+    def test_invalid_filter_returns_400(self):
+        response = self.client.get(reverse('game-list'), {'since': 'foo'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompetitionChangesTests(APITestCase, RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(UserFactory())
+
+        self.competition = CompetitionFactory()
+        self.players = [UserFactory() for _ in range(3)]
+        self.first_game = self.competition.add_game(self.players[0],
+                                                    self.players[1])
+        self.competition.add_game(self.players[1], self.players[0])
+
+    def get_changes(self, last_game_id):
+        url = reverse('competition-changes', kwargs={
+            'pk': self.competition.pk
+        })
+        response = self.client.get(url, {'last_game_id': last_game_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data
+
+    def test_changes_only_contain_new_games(self):
+        game = self.competition.add_game(self.players[2], self.players[0])
+        changes = self.get_changes(self.first_game.id + 1)
+
+        self.assertFalse(changes['resync'])
+        self.assertEqual(changes['last_game_id'], game.id)
+        self.assertEqual([g['id'] for g in changes['games']], [game.id])
+        self.assertEqual(
+            {score['player_id'] for score in changes['scores']},
+            {self.players[0].id, self.players[2].id}
+        )
+
+    def test_changes_contain_rank_moves(self):
+        game = self.competition.add_game(self.players[2], self.players[1])
+        changes = self.get_changes(game.id - 1)
+
+        rankings = self.competition.get_ranking_by_player()
+        rank_moves = {move['player_id']: move
+                      for move in changes['rank_moves']}
+
+        self.assertIsNone(rank_moves[self.players[2].id]['old_ranking'])
+        self.assertEqual(rank_moves[self.players[2].id]['new_ranking'],
+                         rankings[self.players[2]])
+
+    def test_no_changes(self):
+        changes = self.get_changes(self.first_game.id + 1)
+        self.assertEqual(changes['games'], [])
+        self.assertEqual(changes['rank_moves'], [])
+
+    def test_changes_stop_before_pending_games(self):
+        game = self.competition.add_game(self.players[2], self.players[0])
+        self.competition.deferred_scoring = True
+        self.competition.save()
+        self.competition.add_game(self.players[2], self.players[1])
+        changes = self.get_changes(game.id - 1)
+
+        self.assertEqual(changes['last_game_id'], game.id)
+        self.assertEqual([g['id'] for g in changes['games']], [game.id])
+
+    @override_settings(DELTA_SYNC_MAX_GAMES=1)
+    def test_too_many_changes_asks_for_resync(self):
+        changes = self.get_changes(0)
+        self.assertEqual(changes, {'resync': True})
+
+
+class CachedTokenAuthenticationTests(APITestCase, RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = UserFactory()
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('competition-leaderboard',
+                           kwargs={'pk': CompetitionFactory().pk})
+
+    def get(self, key):
+        return self.client.get(self.url, HTTP_AUTHORIZATION='Token %s' % key)
+
+    def test_cached_token_doesnt_query_database(self):
+        self.assertEqual(self.get(self.token.key).status_code,
+                         status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as context:
+            self.get(self.token.key)
+
+        self.assertFalse(any('authtoken' in query['sql']
+                             for query in context.captured_queries))
+
+    # The API answers 403 to failed token authentications since the session
+    # authentication comes first, so the authentication is checked directly
+    def test_deleted_token_is_invalidated(self):
+        self.get(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            CachedTokenAuthentication().authenticate_credentials(
+                self.token.key
+            )
+
+    def test_deactivated_user_is_invalidated(self):
+        self.get(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            CachedTokenAuthentication().authenticate_credentials(
+                self.token.key
+            )
+
+
+class SharedCacheCheckTests(RankMeTestCase):
+    def test_local_memory_cache_is_rejected(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)],
+                         ['api.E001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    }})
+    def test_memcached_is_accepted(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
 class PlayersListTests(APITestCase, RankMeTestCase):
     def test_list_players(self):
         """
@@ -50,3 +324,59 @@ class GameCreateTest(APITestCase, RankMeTestCase):
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIsNotNone(response.data)
+
+
+class LeaderboardAroundTests(APITestCase, RankMeTestCase):
+    def test_around_defaults_to_current_user(self):
+        competition = CompetitionFactory()
+        players = [UserFactory() for _ in range(5)]
+        for player in players[1:]:
+            competition.add_game(players[0], player)
+
+        self.client.force_authenticate(players[0])
+        response = self.client.get(
+            reverse('competition-around', kwargs={'pk': competition.pk}),
+            {'size': 2}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['player_id'], players[0].id)
+        self.assertEqual(response.data[0]['rank'], 1)
+        self.assertEqual(len(response.data), 3)
+
+
+class PlayerSummaryTests(APITestCase, RankMeTestCase):
+    def test_summary(self):
+        competition = CompetitionFactory()
+        players = [UserFactory() for _ in range(3)]
+        competition.add_game(players[0], players[1])
+        competition.add_game(players[0], players[1])
+        competition.add_game(players[2], players[0])
+
+        self.client.force_authenticate(players[0])
+        response = self.client.get(
+            reverse('user-summary', kwargs={'pk': players[0].pk})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['wins'], 2)
+        self.assertEqual(response.data['losses'], 1)
+        self.assertEqual(response.data['favourite_opponent']['id'],
+                         players[1].id)
+        self.assertEqual(response.data['best_ranking']['id'], competition.id)
+
+
+class PredictTests(APITestCase, RankMeTestCase):
+    def test_predict_rejects_same_players(self):
+        competition = CompetitionFactory()
+        player = UserFactory()
+        competition.add_game(player, UserFactory())
+
+        self.client.force_authenticate(player)
+        response = self.client.get(
+            reverse('competition-predict', kwargs={'pk': competition.pk}),
+            {'player1': player.id, 'player2': player.id}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('player2', response.data)
@@ -1,18 +1,78 @@
+import datetime
 import json
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from social.apps.django_app.utils import psa
 from rest_framework import viewsets
+from rest_framework.decorators import detail_route
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 
+from rankme.routers import can_read_from_replica, replica_reads
+
 from ..game.models import Competition, Game, Score
+from ..game.prediction import (
+    get_competition_version, get_scores_snapshot, predict_game
+)
+from ..game.summary import get_player_overview
 from .serializers import (
     CompetitionSerializer, UserSerializer, GameSerializer, ScoreSerializer
 )
 
 
+def get_int_param(request, name):
+    """
+    Return the value of the ``name`` query string parameter as an integer, or
+    None if it's not set.
+    """
+    value = request.query_params.get(name)
+
+    if value is None:
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+
+
+def get_datetime_param(request, name):
+    """
+    Return the value of the ``name`` query string parameter, which can either
+    be a date or a datetime, as an aware datetime, or None if it's not set.
+    """
+    value = request.query_params.get(name)
+
+    if value is None:
+        return None
+
+    try:
+        parsed_value = parse_datetime(value)
+
+        if parsed_value is None:
+            parsed_date = parse_date(value)
+
+            if parsed_date is not None:
+                parsed_value = datetime.datetime.combine(parsed_date,
+                                                         datetime.time())
+    except ValueError:
+        parsed_value = None
+
+    if parsed_value is None:
+        raise ValidationError({name: "A valid date or datetime is required."})
+
+    if timezone.is_naive(parsed_value):
+        parsed_value = timezone.make_aware(parsed_value)
+
+    return parsed_value
+
+
 @psa('social:complete')
 def register_by_access_token(request, backend):
     backend = request.backend
@@ -32,15 +92,154 @@ def register_by_access_token(request, backend):
     return HttpResponse(data_json, content_type='application/json')
 
 
-class CompetitionViewSet(viewsets.ReadOnlyModelViewSet):
+class ReplicaListMixin:
+    """
+    Send the reads of the list endpoint to the replica database (see
+    ``rankme.routers``).
+    """
+    def list(self, request, *args, **kwargs):
+        if not can_read_from_replica(request):
+            return super().list(request, *args, **kwargs)
+
+        with replica_reads():
+            return super().list(request, *args, **kwargs)
+
+
+class CompetitionViewSet(ReplicaListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API Competition endpoint
     """
-    queryset = Competition.objects.all()
+    queryset = Competition.objects.prefetch_related(
+        Prefetch('scores', queryset=Score.objects.select_related(
+            'player__profile'
+        ))
+    )
     serializer_class = CompetitionSerializer
+    lookup_value_regex = r'\d+'
+    # Maximum number of players returned on each side by the around endpoint
+    MAX_AROUND_SIZE = 50
+    # Maximum number of players returned by a slice of the leaderboard
+    MAX_LEADERBOARD_LIMIT = 1000
+
+    @detail_route()
+    def leaderboard(self, request, pk=None):
+        """
+        Return the ranked players of the competition, without their avatar
+        nor the competition details. The leaderboard as it was after a given
+        game or at a given date can be fetched with the ``game`` or ``date``
+        query string parameters. A slice of the current leaderboard can be
+        fetched with the ``offset`` and ``limit`` parameters.
+        """
+        game_id = get_int_param(request, 'game')
+        date = get_datetime_param(request, 'date')
+
+        if game_id is not None or date is not None:
+            competition = get_object_or_404(Competition, pk=pk)
+            leaderboard = competition.get_score_board_at(
+                game_id if game_id is not None else date
+            )
+        else:
+            # The competition tells which field the players are ranked by
+            competition = get_object_or_404(
+                Competition.objects.only('id', 'ranking_order'), pk=pk
+            )
+            limit = get_int_param(request, 'limit')
+            if limit is not None:
+                limit = min(max(limit, 0), self.MAX_LEADERBOARD_LIMIT)
+
+            leaderboard = Score.objects.get_leaderboard(
+                pk, offset=max(get_int_param(request, 'offset') or 0, 0),
+                limit=limit, field=competition.ranking_field
+            )
+
+        return Response(leaderboard)
+
+    @detail_route()
+    def around(self, request, pk=None):
+        """
+        Return the leaderboard entries of a player (given by the ``player``
+        query string parameter, the current user by default) and of the
+        ``size`` players right above and below them.
+        """
+        player_id = get_int_param(request, 'player')
+        if player_id is None:
+            player_id = request.user.id
+
+        size = get_int_param(request, 'size')
+        if size is None:
+            size = settings.LEADERBOARD_AROUND_SIZE
 
+        competition = get_object_or_404(
+            Competition.objects.only('id', 'ranking_order'), pk=pk
+        )
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+        return Response(Score.objects.get_leaderboard_around(
+            pk, player_id, min(max(size, 0), self.MAX_AROUND_SIZE),
+            competition.ranking_field
+        ))
+
+    @detail_route()
+    def predict(self, request, pk=None):
+        """
+        Return the win probability of ``player1`` against ``player2`` (given
+        as query string parameters), the match quality and the resulting
+        scores and ranks of both players for each outcome. Nothing is written
+        to the database.
+        """
+        player_ids = []
+        for param in ('player1', 'player2'):
+            player_id = get_int_param(request, param)
+            if player_id is None:
+                raise ValidationError({param: "This field is required."})
+
+            player_ids.append(player_id)
+
+        if player_ids[0] == player_ids[1]:
+            raise ValidationError({
+                'player2': "The players must be different."
+            })
+
+        version = get_competition_version(pk)
+        if version is None:
+            raise Http404
+
+        snapshot = get_scores_snapshot(int(pk), version)
+
+        return Response(predict_game(snapshot, *player_ids))
+
+    @detail_route()
+    def changes(self, request, pk=None):
+        """
+        Return the games, scores and rank moves since the game given in the
+        ``last_game_id`` query string parameter. If too many games were
+        played since then, only ``{"resync": true}`` is returned and the
+        client should fetch the leaderboard again.
+        """
+        last_game_id = get_int_param(request, 'last_game_id')
+        if last_game_id is None:
+            raise ValidationError({'last_game_id': "This field is required."})
+
+        # Don't use get_object(), the viewset queryset prefetches all the
+        # scores
+        competition = get_object_or_404(Competition, pk=pk)
+        changes = competition.get_changes_since(last_game_id,
+                                                settings.DELTA_SYNC_MAX_GAMES)
+
+        if changes is None:
+            return Response({'resync': True})
+
+        games = changes['games']
+
+        return Response({
+            'resync': False,
+            'last_game_id': games[-1].id if games else last_game_id,
+            'games': GameSerializer(games, many=True).data,
+            'scores': ScoreSerializer(changes['scores'], many=True).data,
+            'rank_moves': changes['rank_moves'],
+        })
+
+
+class UserViewSet(ReplicaListMixin, viewsets.ReadOnlyModelViewSet):
     """
     API Users endpoint
     """
@@ -58,18 +257,80 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = UserSerializer(user)
         return Response(serializer.data)
 
+    @detail_route()
+    def summary(self, request, pk=None):
+        """
+        Return the overview of the player across all their competitions:
+        wins and losses, score trend, best rank, favourite opponent and
+        competitions.
+        """
+        player = get_object_or_404(get_user_model(), pk=pk)
+
+        return Response(get_player_overview(player))
+
 
-class GameViewSet(viewsets.ModelViewSet):
+class GameViewSet(ReplicaListMixin, viewsets.ModelViewSet):
     """
     API Games endpoint
+
+    Games can be filtered with the ``competition``, ``player`` (either the
+    winner or the loser), ``since`` (date or datetime) and ``after_id`` query
+    string parameters. ``is_scored`` tells whether a game announced in a
+    competition with deferred scoring has been rated yet, ``pending=1`` only
+    lists the games that haven't.
     """
     queryset = Game.objects.all()
     serializer_class = GameSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        competition_id = get_int_param(self.request, 'competition')
+        if competition_id is not None:
+            queryset = queryset.filter(competition_id=competition_id)
+
+        player_id = get_int_param(self.request, 'player')
+        if player_id is not None:
+            queryset = queryset.filter(Q(winner_id=player_id) |
+                                       Q(loser_id=player_id))
+
+        since = get_datetime_param(self.request, 'since')
+        if since is not None:
+            queryset = queryset.filter(date__gte=since)
+
+        after_id = get_int_param(self.request, 'after_id')
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+
+        if get_int_param(self.request, 'pending'):
+            queryset = queryset.filter(is_scored=False)
+
+        return queryset
 
-class ScoreViewSet(viewsets.ModelViewSet):
+
+class ScoreViewSet(ReplicaListMixin, viewsets.ModelViewSet):
     """
     API Scores endpoint
+
+    Scores can be filtered with the ``competition``, ``player`` and
+    ``after_id`` query string parameters.
     """
-    queryset = Score.objects.all()
+    queryset = Score.objects.select_related('player__profile')
     serializer_class = ScoreSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        competition_id = get_int_param(self.request, 'competition')
+        if competition_id is not None:
+            queryset = queryset.filter(competition_id=competition_id)
+
+        player_id = get_int_param(self.request, 'player')
+        if player_id is not None:
+            queryset = queryset.filter(player_id=player_id)
+
+        after_id = get_int_param(self.request, 'after_id')
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+
+        return queryset
@@ -1,11 +1,78 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.template.response import TemplateResponse
 
+from .exceptions import CannotLeaveCompetitionError
 from .models import Competition, Game, Score
 
 
+class CompetitionMembersForm(forms.Form):
+    users = forms.ModelMultipleChoiceField(
+        queryset=get_user_model().objects.order_by('username'),
+        widget=forms.SelectMultiple(attrs={'size': 20})
+    )
+
+
+def change_members(modeladmin, request, queryset, action, add):
+    """
+    Ask for the users to add to (or remove from) the selected competitions,
+    then update the memberships in bulk.
+    """
+    form = CompetitionMembersForm(request.POST if 'apply' in request.POST
+                                  else None)
+
+    if form.is_valid():
+        users = form.cleaned_data['users']
+
+        for competition in queryset:
+            try:
+                if add:
+                    changed_users = competition.add_users_access(users)
+                else:
+                    changed_users = competition.remove_users_access(users)
+            except CannotLeaveCompetitionError:
+                modeladmin.message_user(
+                    request, "The creator of %s can't be removed from it."
+                    % competition, messages.ERROR
+                )
+                continue
+
+            modeladmin.message_user(request, "%s: %d users %s." % (
+                competition, len(changed_users), 'added' if add else 'removed'
+            ))
+
+        return None
+
+    return TemplateResponse(
+        request, 'admin/game/competition/change_members.html', {
+            'title': ("Add users to competitions" if add
+                      else "Remove users from competitions"),
+            'competitions': queryset,
+            'form': form,
+            'action': action,
+            'action_checkbox_name': admin.ACTION_CHECKBOX_NAME,
+            'opts': modeladmin.model._meta,
+        }
+    )
+
+
+def add_members(modeladmin, request, queryset):
+    return change_members(modeladmin, request, queryset, 'add_members', True)
+add_members.short_description = "Add users to the selected competitions"
+
+
+def remove_members(modeladmin, request, queryset):
+    return change_members(modeladmin, request, queryset, 'remove_members',
+                          False)
+remove_members.short_description = ("Remove users from the selected"
+                                    " competitions")
+
+
 class CompetitionAdmin(admin.ModelAdmin):
     fields = ['name', 'description', 'start_date', 'end_date', 'slug',
-              'players', 'creator']
+              'players', 'creator', 'ranking_order', 'deferred_scoring']
+    actions = [add_members, remove_members]
 
 
 class ScoreAdmin(admin.ModelAdmin):
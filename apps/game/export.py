@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import uuid
+
+from django.db import connection, transaction
+
+from .models import Game, HistoricalScore
+
+EXPORT_COLUMNS = (
+    'game_id', 'date', 'competition_id', 'winner_id', 'loser_id',
+    'winner_score', 'winner_stdev', 'loser_score', 'loser_stdev',
+)
+
+EXPORT_QUERY = """
+    SELECT g.id, g.date, g.competition_id, g.winner_id, g.loser_id,
+           wh.score, wh.stdev, lh.score, lh.stdev
+    FROM {game_table} g
+    LEFT JOIN {historical_score_table} wh
+        ON wh.game_id = g.id AND wh.player_id = g.winner_id
+    LEFT JOIN {historical_score_table} lh
+        ON lh.game_id = g.id AND lh.player_id = g.loser_id
+    WHERE g.competition_id = %s
+    ORDER BY g.id
+"""
+
+
+def add_archived_scores(rows, archived_scores):
+    """
+    Return the given export rows with the winner and loser scores taken from
+    the ``archived_scores`` dict {(game_id, player_id): (score, stdev)}.
+    """
+    missing = (None, None)
+
+    return [
+        tuple(row[:5]) + archived_scores.get((row[0], row[3]), missing) +
+        archived_scores.get((row[0], row[4]), missing)
+        for row in rows
+    ]
+
+
+def iter_game_rows(competition, chunk_size=5000):
+    """
+    Yield lists of at most ``chunk_size`` rows of the competition games,
+    joined with the winner and loser historical scores, in the order they
+    were played. A server-side cursor is used so that the memory used doesn't
+    depend on the number of games in the competition. The scores of archived
+    competitions are read from their ``HistoryArchive``.
+    """
+    query = EXPORT_QUERY.format(
+        game_table=Game._meta.db_table,
+        historical_score_table=HistoricalScore._meta.db_table,
+    )
+
+    with transaction.atomic():
+        archive = competition.get_history_archive()
+        if archive is not None:
+            archived_scores = {
+                (historical_score.game_id, historical_score.player_id):
+                    (historical_score.score, historical_score.stdev)
+                for historical_score in archive.get_historical_scores()
+            }
+        else:
+            archived_scores = None
+
+        connection.ensure_connection()
+        # Named cursors are psycopg2 server-side cursors, Django doesn't
+        # expose them before 1.11
+        cursor = connection.connection.cursor(
+            name='export_%s' % uuid.uuid4().hex
+        )
+        cursor.itersize = chunk_size
+
+        try:
+            cursor.execute(query, [competition.id])
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+
+                if not rows:
+                    break
+
+                if archived_scores is not None:
+                    rows = add_archived_scores(rows, archived_scores)
+
+                yield rows
+        finally:
+            cursor.close()
+
+
+def export_csv(competition, chunk_size=5000):
+    """
+    Yield the competition games export as CSV, one chunk of lines at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for rows in iter_game_rows(competition, chunk_size):
+        writer.writerows(
+            (row[0], row[1].isoformat()) + tuple(row[2:]) for row in rows
+        )
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Only the header is left in the buffer if the competition has no games
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_ndjson(competition, chunk_size=5000):
+    """
+    Yield the competition games export as newline-delimited JSON, one chunk
+    of lines at a time.
+    """
+    encoder = json.JSONEncoder()
+
+    for rows in iter_game_rows(competition, chunk_size):
+        yield ''.join(
+            encoder.encode(dict(zip(
+                EXPORT_COLUMNS,
+                (row[0], row[1].isoformat()) + tuple(row[2:])
+            ))) + '\n'
+            for row in rows
+        )
+
+
+EXPORT_FORMATS = {
+    'csv': (export_csv, 'text/csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
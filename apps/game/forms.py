@@ -50,7 +50,17 @@ class GameForm(forms.Form):
 class CompetitionForm(forms.ModelForm):
     class Meta:
         model = Competition
-        fields = ('name', 'description', 'players', 'start_date', 'end_date')
+        fields = ('name', 'description', 'players', 'start_date', 'end_date',
+                  'ranking_order')
+
+    def __init__(self, *args, **kwargs):
+        super(CompetitionForm, self).__init__(*args, **kwargs)
+        self.fields['ranking_order'].required = False
+
+    def clean_ranking_order(self):
+        # Competitions are ranked by skill unless told otherwise
+        return (self.cleaned_data['ranking_order'] or
+                Competition.RANKING_SKILL)
 
     def save(self, creator):
         competition = super(CompetitionForm, self).save(commit=False)
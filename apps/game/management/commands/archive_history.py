@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Competition, HistoryArchive
+
+
+class Command(BaseCommand):
+    help = ("Moves the historical scores of finished competitions to packed"
+            " per-competition archives")
+
+    def handle(self, *args, **options):
+        competitions = Competition.past_objects.filter(
+            history_archive__isnull=True
+        )
+
+        for competition in competitions:
+            archive = HistoryArchive.objects.archive(competition)
+            self.stdout.write(
+                "Archived {nb_scores} historical scores of {competition}"
+                .format(nb_scores=len(archive.get_historical_scores()),
+                        competition=competition)
+            )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...export import EXPORT_FORMATS
+from ...models import Competition
+
+
+class Command(BaseCommand):
+    help = ("Exports the games of a competition with the scores of both"
+            " players after each game")
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_slug')
+        parser.add_argument('--format', dest='export_format', default='csv',
+                            choices=sorted(EXPORT_FORMATS.keys()))
+        parser.add_argument('--output', dest='output', default=None,
+                            help="File to write the export to (defaults to"
+                                 " stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            competition = Competition.objects.get(
+                slug=options['competition_slug']
+            )
+        except Competition.DoesNotExist:
+            raise CommandError("Competition %s doesn't exist" %
+                               options['competition_slug'])
+
+        export, _ = EXPORT_FORMATS[options['export_format']]
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                for chunk in export(competition):
+                    output.write(chunk)
+        else:
+            for chunk in export(competition):
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Competition
+from ...snapshot import freeze
+
+
+class Command(BaseCommand):
+    help = ("Precomputes and stores the pages data of finished competitions"
+            " that are not frozen yet")
+
+    def handle(self, *args, **options):
+        competitions = Competition.past_objects.filter(snapshot__isnull=True)
+
+        for competition in competitions:
+            freeze(competition)
+            self.stdout.write("Froze {competition}".format(
+                competition=competition
+            ))
@@ -1,7 +1,12 @@
+import multiprocessing
+import time
+
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections
 
-from ...models import Game, HistoricalScore, Score
+from ...models import Competition, PlayerSummary, Score
+from ...replay import recalculate_competition
 
 
 class Command(BaseCommand):
@@ -9,34 +14,63 @@ class Command(BaseCommand):
     help = ("Recalcutes the standings by running all games in the db with the"
             " provided initial score and sigma")
 
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', dest='jobs', type=int, default=1,
+                            help="Number of competitions to recalculate in"
+                                 " parallel")
+
     def handle(self, *args, **options):
         try:
-            score = args[0]
+            score = float(args[0])
         except IndexError:
             score = settings.GAME_INITIAL_MU
 
         try:
-            stdev = args[1]
+            stdev = float(args[1])
         except IndexError:
             stdev = settings.GAME_INITIAL_SIGMA
 
-        scores = Score.objects.all()
-        games = Game.objects.select_related('competition').order_by('id')
+        start = time.time()
+        # Players of several competitions would have their summary rebuilt by
+        # concurrent workers, so it's done once at the end
+        tasks = [
+            (competition_id, score, stdev, False)
+            for competition_id in Competition.objects.values_list('id',
+                                                                  flat=True)
+        ]
 
-        # remove all HistoricalScores
-        HistoricalScore.objects.all().delete()
+        if options['jobs'] > 1:
+            # Forked workers must not share the connection of the parent
+            connections.close_all()
 
-        scores.update(score=score, stdev=stdev)
+            with multiprocessing.Pool(options['jobs']) as pool:
+                results = pool.starmap(recalculate_competition, tasks)
+        else:
+            results = [recalculate_competition(*task) for task in tasks]
 
-        for game in games:
-            game.update_score(notify=False)
+        PlayerSummary.objects.rebuild(
+            Score.objects.values_list('player_id', flat=True).distinct()
+        )
+
+        nb_games = 0
+        for competition_id, competition_nb_games, duration in results:
+            nb_games += competition_nb_games
+            self.stdout.write(
+                "Competition {competition_id}: {nb_games} games in"
+                " {duration:.2f}s".format(
+                    competition_id=competition_id,
+                    nb_games=competition_nb_games,
+                    duration=duration
+                )
+            )
 
         self.stdout.write(
             "Recalculated the standings for {nb_games} games with an initial"
             " score of {initial_score} and an initial sigma of"
-            " {initial_sigma}".format(
-                nb_games=len(games),
+            " {initial_sigma} in {duration:.2f}s".format(
+                nb_games=nb_games,
                 initial_score=score,
-                initial_sigma=stdev
+                initial_sigma=stdev,
+                duration=time.time() - start
             )
         )
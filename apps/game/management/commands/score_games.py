@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...scoring import get_pending_competition_ids, score_all_pending_games
+
+
+class Command(BaseCommand):
+    help = ("Rates the pending games of the competitions with deferred"
+            " scoring")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', dest='batch_size', type=int,
+                            default=settings.SCORING_BATCH_SIZE,
+                            help="Maximum number of games rated in a single"
+                                 " transaction")
+        parser.add_argument('--loop', dest='loop', action='store_true',
+                            default=False,
+                            help="Keep polling for new games instead of"
+                                 " exiting once every game is rated")
+        parser.add_argument('--interval', dest='interval', type=float,
+                            default=settings.SCORING_POLL_INTERVAL,
+                            help="Number of seconds between two polls")
+
+    def handle(self, *args, **options):
+        while True:
+            for competition_id in get_pending_competition_ids():
+                start = time.time()
+                nb_games = score_all_pending_games(competition_id,
+                                                   options['batch_size'])
+                self.stdout.write(
+                    "Competition {competition_id}: rated {nb_games} games in"
+                    " {duration:.2f}s".format(
+                        competition_id=competition_id,
+                        nb_games=nb_games,
+                        duration=time.time() - start
+                    )
+                )
+
+            if not options['loop']:
+                return
+
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0013_auto_20160405_1002'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='date',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterIndexTogether(
+            name='game',
+            index_together=set([('competition', 'id')]),
+        ),
+    ]
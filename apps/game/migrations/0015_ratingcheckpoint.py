@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0014_game_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_games', models.PositiveIntegerField()),
+                ('ratings', models.BinaryField()),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_checkpoints', to='game.Competition')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_checkpoints', to='game.Game')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='ratingcheckpoint',
+            unique_together=set([('competition', 'game')]),
+        ),
+    ]
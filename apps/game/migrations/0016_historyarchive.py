@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0015_ratingcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('competition', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='history_archive', to='game.Competition')),
+            ],
+        ),
+    ]
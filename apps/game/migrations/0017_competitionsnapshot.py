@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0016_historyarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompetitionSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('competition', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='game.Competition')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0017_competitionsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competition',
+            name='deferred_scoring',
+            field=models.BooleanField(default=False, help_text='Announced games are rated in the background by the score_games command instead of during the announce.'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='is_scored',
+            field=models.BooleanField(default=True),
+        ),
+    ]
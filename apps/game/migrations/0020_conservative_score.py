@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def compute_conservative_scores(apps, schema_editor):
+    Score = apps.get_model('game', 'Score')
+    Score.objects.update(
+        conservative_score=(F('score') -
+                            settings.CONSERVATIVE_RATING_FACTOR * F('stdev'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0019_score_competition_score_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competition',
+            name='ranking_order',
+            field=models.CharField(choices=[('skill', 'Skill'), ('conservative', 'Conservative skill (skill minus its uncertainty)')], default='skill', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='score',
+            name='conservative_score',
+            field=models.FloatField(default=0, verbose_name='conservative skills'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compute_conservative_scores,
+                             migrations.RunPython.noop),
+        migrations.AlterIndexTogether(
+            name='score',
+            index_together=set([('competition', 'score'), ('competition', 'conservative_score')]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0021_playersummary'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='score',
+            index_together=set([('competition', 'score', 'player'), ('competition', 'conservative_score', 'player')]),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0022_score_player_ranking_indexes'),
+    ]
+
+    # Partial index of the games waiting to be rated, so that the scorer
+    # doesn't scan the whole table when it polls for them
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX game_game_pending_idx'
+            ' ON game_game (competition_id, id) WHERE NOT is_scored',
+            'DROP INDEX game_game_pending_idx',
+        ),
+    ]
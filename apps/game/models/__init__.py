@@ -1,3 +1,7 @@
+from .archive import HistoryArchive  # NOQA
+from .checkpoint import RatingCheckpoint  # NOQA
 from .competition import Competition  # NOQA
 from .game import Game  # NOQA
 from .score import HistoricalScore, Score  # NOQA
+from .snapshot import CompetitionSnapshot  # NOQA
+from .summary import PlayerSummary  # NOQA
@@ -0,0 +1,77 @@
+import struct
+
+from django.apps import apps
+from django.db import models, transaction
+
+from .score import HistoricalScore
+
+# Game id, player id, score and standard deviation of a historical score
+HISTORICAL_SCORE_STRUCT = struct.Struct('<qqdd')
+
+
+def thaw_competition(competition_id):
+    # The historical scores are moved with bulk writes, which don't send the
+    # signals that thaw snapshots
+    apps.get_model('game', 'CompetitionSnapshot').objects.thaw(competition_id)
+
+
+class HistoryArchiveManager(models.Manager):
+    @transaction.atomic
+    def archive(self, competition):
+        """
+        Move the historical scores of the competition to a new archive and
+        return it.
+        """
+        historical_scores = (HistoricalScore.objects
+                             .filter(game__competition=competition)
+                             .order_by('game_id', 'id')
+                             .values_list('game_id', 'player_id', 'score',
+                                          'stdev'))
+
+        archive = self.create(competition=competition, data=b''.join(
+            HISTORICAL_SCORE_STRUCT.pack(*row) for row in historical_scores
+        ))
+        HistoricalScore.objects.filter(game__competition=competition).delete()
+        thaw_competition(competition.id)
+
+        return archive
+
+
+class HistoryArchive(models.Model):
+    """
+    Historical scores of a finished competition, packed in a single blob
+    ordered by game, so that they don't weigh on the ``HistoricalScore``
+    table anymore.
+    """
+    competition = models.OneToOneField('Competition',
+                                       related_name='history_archive')
+    data = models.BinaryField()
+    date = models.DateTimeField(auto_now_add=True)
+
+    objects = HistoryArchiveManager()
+
+    def get_historical_scores(self):
+        """
+        Return the list of archived historical scores (not saved), ordered by
+        game.
+        """
+        if not hasattr(self, '_historical_scores'):
+            self._historical_scores = [
+                HistoricalScore(game_id=game_id, player_id=player_id,
+                                score=score, stdev=stdev)
+                for game_id, player_id, score, stdev
+                in HISTORICAL_SCORE_STRUCT.iter_unpack(bytes(self.data))
+            ]
+
+        return self._historical_scores
+
+    @transaction.atomic
+    def restore(self):
+        """
+        Move the archived historical scores back to the ``HistoricalScore``
+        table and delete the archive.
+        """
+        HistoricalScore.objects.bulk_create(self.get_historical_scores(),
+                                            batch_size=1000)
+        self.delete()
+        thaw_competition(self.competition_id)
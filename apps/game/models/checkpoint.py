@@ -0,0 +1,191 @@
+import struct
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from trueskill import Rating
+
+from .score import HistoricalScore, Score, replay_games, save_ratings
+from .summary import PlayerSummary
+
+# Player id, mu and sigma of a player
+RATING_STRUCT = struct.Struct('<qdd')
+
+
+def pack_ratings(ratings):
+    """
+    Pack the given ``ratings`` dict {player_id: Rating} as bytes.
+    """
+    return b''.join(RATING_STRUCT.pack(player_id, rating.mu, rating.sigma)
+                    for player_id, rating in ratings.items())
+
+
+def unpack_ratings(data):
+    """
+    Return the ratings dict {player_id: Rating} packed by ``pack_ratings``.
+    """
+    return {
+        player_id: Rating(mu, sigma)
+        for player_id, mu, sigma in RATING_STRUCT.iter_unpack(bytes(data))
+    }
+
+
+class RatingCheckpointManager(models.Manager):
+    def get_before(self, competition_id, game_id):
+        """
+        Return the latest checkpoint of the competition taken at or before
+        the game ``game_id``, or None if there's none.
+        """
+        return (self.get_queryset()
+                .filter(competition_id=competition_id, game_id__lte=game_id)
+                .order_by('-game_id')
+                .first())
+
+    def create_if_due(self, game):
+        """
+        Create a checkpoint with the current scores of the game competition
+        if at least ``RATING_CHECKPOINT_INTERVAL`` games were rated since
+        the previous checkpoint, ``game`` included. Since game ids grow by at
+        least one per game, the rated games are only counted once the ids
+        moved far enough from the previous checkpoint, so that this usually
+        costs a single query.
+        """
+        interval = settings.RATING_CHECKPOINT_INTERVAL
+        last_checkpoint = self.get_before(game.competition_id, game.id)
+        last_game_id = last_checkpoint.game_id if last_checkpoint else 0
+
+        if game.id - last_game_id < interval:
+            return None
+
+        # Pending games don't count, like in the replays
+        nb_new_games = game.competition.games.filter(
+            id__gt=last_game_id, id__lte=game.id, is_scored=True
+        ).count()
+
+        if nb_new_games < interval:
+            return None
+
+        nb_games = nb_new_games + (last_checkpoint.nb_games
+                                   if last_checkpoint else 0)
+        ratings = {
+            player_id: Rating(mu, sigma)
+            for player_id, mu, sigma in (
+                Score.objects.filter(competition_id=game.competition_id)
+                             .values_list('player_id', 'score', 'stdev')
+            )
+        }
+
+        return self.create(competition_id=game.competition_id, game=game,
+                           nb_games=nb_games, ratings=pack_ratings(ratings))
+
+
+class RatingCheckpoint(models.Model):
+    """
+    Scores of all the players of a competition right after ``game``, stored
+    as a packed blob, so that replays don't have to start from the first game
+    of the competition.
+    """
+    competition = models.ForeignKey('Competition',
+                                    related_name='rating_checkpoints')
+    game = models.ForeignKey('Game', related_name='rating_checkpoints')
+    nb_games = models.PositiveIntegerField()
+    ratings = models.BinaryField()
+
+    objects = RatingCheckpointManager()
+
+    class Meta:
+        unique_together = (
+            ('competition', 'game'),
+        )
+
+    def get_ratings(self):
+        return unpack_ratings(self.ratings)
+
+
+def replay_with_checkpoints(competition_id, games, ratings, initial_rating,
+                            nb_games_before=0):
+    """
+    Same as ``replay_games`` but also return the list of checkpoints (not
+    saved) to create every ``RATING_CHECKPOINT_INTERVAL`` games, the given
+    ``games`` starting after ``nb_games_before`` games in the competition.
+    """
+    interval = settings.RATING_CHECKPOINT_INTERVAL
+    position = nb_games_before
+    historical_scores = []
+    checkpoints = []
+
+    while games:
+        chunk_size = interval - position % interval
+        chunk, games = games[:chunk_size], games[chunk_size:]
+
+        historical_scores.extend(replay_games(chunk, ratings, initial_rating))
+        position += len(chunk)
+
+        if position % interval == 0:
+            checkpoints.append(RatingCheckpoint(
+                competition_id=competition_id, game_id=chunk[-1][0],
+                nb_games=position, ratings=pack_ratings(ratings)
+            ))
+
+    return historical_scores, checkpoints
+
+
+def get_ratings_at(competition, game_id):
+    """
+    Return the ratings dict {player_id: Rating} of the players of the
+    competition right after the game ``game_id``, replaying at most
+    ``RATING_CHECKPOINT_INTERVAL`` games from the nearest checkpoint.
+    """
+    checkpoint = RatingCheckpoint.objects.get_before(competition.id, game_id)
+    ratings = checkpoint.get_ratings() if checkpoint else {}
+
+    games = (competition.games
+             .filter(id__gt=checkpoint.game_id if checkpoint else 0,
+                     id__lte=game_id, is_scored=True)
+             .order_by('id')
+             .values_list('id', 'winner_id', 'loser_id'))
+    replay_games(games, ratings, Rating(settings.GAME_INITIAL_MU,
+                                        settings.GAME_INITIAL_SIGMA))
+
+    return ratings
+
+
+def replay_from(competition, game_id):
+    """
+    Replay the games of the competition from the game ``game_id`` (included)
+    starting from the nearest checkpoint before it, and update the historical
+    scores, checkpoints and scores accordingly. This must be called in a
+    transaction.
+    """
+    checkpoint = RatingCheckpoint.objects.get_before(competition.id,
+                                                     game_id - 1)
+    start_game_id = checkpoint.game_id if checkpoint else 0
+    ratings = checkpoint.get_ratings() if checkpoint else {}
+
+    games = list(competition.games
+                            .filter(id__gt=start_game_id, is_scored=True)
+                            .order_by('id')
+                            .values_list('id', 'winner_id', 'loser_id'))
+
+    historical_scores, checkpoints = replay_with_checkpoints(
+        competition.id, games, ratings,
+        Rating(settings.GAME_INITIAL_MU, settings.GAME_INITIAL_SIGMA),
+        checkpoint.nb_games if checkpoint else 0
+    )
+
+    HistoricalScore.objects.filter(game__competition=competition,
+                                   game_id__gt=start_game_id).delete()
+    RatingCheckpoint.objects.filter(competition=competition,
+                                    game_id__gt=start_game_id).delete()
+
+    HistoricalScore.objects.bulk_create(historical_scores, batch_size=1000)
+    RatingCheckpoint.objects.bulk_create(checkpoints)
+
+    # Players who don't have any game left don't have a score anymore
+    competition.scores.exclude(player_id__in=list(ratings)).delete()
+    save_ratings(competition.id, ratings)
+    # The score changes of the replayed games are part of the summaries
+    PlayerSummary.objects.rebuild(ratings)
+    # The bulk writes above don't send the signals that thaw snapshots
+    apps.get_model('game', 'CompetitionSnapshot').objects.thaw(competition.id)
@@ -1,17 +1,150 @@
+from collections import OrderedDict
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Q
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
 
+from ...user.models import get_display_name
 from .. import signals
 from ..exceptions import CannotLeaveCompetitionError
+from .archive import HistoryArchive
+from .checkpoint import get_ratings_at
 from .game import Game
-from .score import Score
+from .score import (
+    HistoricalScore, Score, build_leaderboard, get_ranking_value
+)
+
+
+# Correlated subqueries summarizing a competition, see
+# ``CompetitionManager.get_summaries``
+COMPETITION_SUMMARY_SQL = OrderedDict([
+    ('status', (
+        "CASE WHEN {competition}.start_date > %s THEN 'upcoming'"
+        " WHEN {competition}.end_date <= %s THEN 'past'"
+        " ELSE 'ongoing' END"
+    )),
+    ('nb_players', (
+        'SELECT COUNT(*) FROM {membership}'
+        ' WHERE {membership}.competition_id = {competition}.id'
+    )),
+    ('nb_games', (
+        'SELECT COUNT(*) FROM {game}'
+        ' WHERE {game}.competition_id = {competition}.id'
+    )),
+    ('last_game_date', (
+        'SELECT {game}.date FROM {game}'
+        ' WHERE {game}.competition_id = {competition}.id'
+        ' ORDER BY {game}.id DESC LIMIT 1'
+    )),
+    ('leader', (
+        'SELECT json_build_array(player.id, player.first_name,'
+        ' player.last_name, player.username)'
+        ' FROM {score} AS score'
+        ' INNER JOIN {user} AS player ON player.id = score.player_id'
+        ' WHERE score.competition_id = {competition}.id'
+        " ORDER BY CASE WHEN {competition}.ranking_order = 'conservative'"
+        ' THEN score.conservative_score ELSE score.score END DESC'
+        ' LIMIT 1'
+    )),
+])
+
+# Competitions of a player along with their score, their rank (computed over
+# all the scores of these competitions) and the games they played there, see
+# ``CompetitionManager.get_played_by``
+PLAYED_COMPETITIONS_SQL = (
+    'SELECT {competition}.*, ranked.ranking, ranked.score AS mu,'
+    ' ranked.stdev AS sigma, COALESCE(games.nb_games, 0) AS nb_games,'
+    ' games.last_game_date'
+    ' FROM ('
+    'SELECT score.competition_id, score.player_id, score.score, score.stdev,'
+    ' RANK() OVER (PARTITION BY score.competition_id'
+    ' ORDER BY CASE WHEN ranked_competition.ranking_order = %s'
+    ' THEN score.conservative_score ELSE score.score END DESC) AS ranking'
+    ' FROM {score} AS score'
+    ' INNER JOIN {competition} AS ranked_competition'
+    ' ON ranked_competition.id = score.competition_id'
+    ' WHERE score.competition_id IN ('
+    'SELECT competition_id FROM {score} WHERE player_id = %s)'
+    ') AS ranked'
+    ' INNER JOIN {competition} ON {competition}.id = ranked.competition_id'
+    ' LEFT OUTER JOIN ('
+    'SELECT competition_id, COUNT(*) AS nb_games, MAX(date) AS last_game_date'
+    ' FROM {game} WHERE winner_id = %s OR loser_id = %s'
+    ' GROUP BY competition_id'
+    ') AS games ON games.competition_id = {competition}.id'
+    ' WHERE ranked.player_id = %s'
+    ' ORDER BY {competition}.start_date DESC, {competition}.id DESC'
+)
 
 
 class CompetitionManager(models.Manager):
+    def get_summaries(self):
+        """
+        Return a dict {status: competitions} of all the competitions grouped
+        by status ('upcoming', 'ongoing' or 'past'). Every competition has
+        ``nb_players``, ``nb_games``, ``last_game_date`` and ``leader`` (a
+        dict with the id and the name of the first player, or None)
+        attributes. Everything is fetched in a single query.
+        """
+        now = timezone.now()
+        tables = {
+            'competition': self.model._meta.db_table,
+            'membership': self.model.players.through._meta.db_table,
+            'game': Game._meta.db_table,
+            'score': Score._meta.db_table,
+            'user': get_user_model()._meta.db_table,
+        }
+        competitions = self.get_queryset().extra(
+            select=OrderedDict(
+                (name, sql.format(**tables))
+                for name, sql in COMPETITION_SUMMARY_SQL.items()
+            ),
+            select_params=(now, now)
+        )
+        summaries = OrderedDict(
+            (status, []) for status in ('upcoming', 'ongoing', 'past')
+        )
+
+        for competition in competitions:
+            if competition.leader is not None:
+                player_id, first_name, last_name, username = (
+                    competition.leader
+                )
+                competition.leader = {
+                    'id': player_id,
+                    'name': get_display_name(first_name, last_name, username),
+                }
+
+            summaries[competition.status].append(competition)
+
+        return summaries
+
+    def get_played_by(self, player):
+        """
+        Return the list of competitions the given player has a score in, the
+        latest first. Every competition has the ``mu``, ``sigma`` and
+        ``ranking`` of the player, and the number of games they played there
+        (``nb_games``) and the date of the last one (``last_game_date``).
+        Everything is fetched in a single query.
+        """
+        sql = PLAYED_COMPETITIONS_SQL.format(
+            competition=self.model._meta.db_table,
+            score=Score._meta.db_table,
+            game=Game._meta.db_table,
+        )
+
+        return list(self.raw(sql, [
+            self.model.RANKING_CONSERVATIVE, player.id, player.id, player.id,
+            player.id
+        ]))
+
     def get_visible_for_user(self, user):
         """
         Return all competitions the given user has access to.
@@ -40,6 +173,14 @@ class UpcomingCompetitionManager(CompetitionManager):
 
 
 class Competition(models.Model):
+    RANKING_SKILL = 'skill'
+    RANKING_CONSERVATIVE = 'conservative'
+    RANKING_ORDERS = (
+        (RANKING_SKILL, _('Skill')),
+        (RANKING_CONSERVATIVE, _('Conservative skill (skill minus its'
+                                 ' uncertainty)')),
+    )
+
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True)
     start_date = models.DateTimeField(default=timezone.now)
@@ -50,6 +191,13 @@ class Competition(models.Model):
                                      blank=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL,
                                 related_name='my_competitions')
+    ranking_order = models.CharField(max_length=20, choices=RANKING_ORDERS,
+                                     default=RANKING_SKILL)
+    deferred_scoring = models.BooleanField(
+        default=False,
+        help_text="Announced games are rated in the background by the"
+                  " score_games command instead of during the announce."
+    )
 
     objects = CompetitionManager()
     ongoing_objects = OngoingCompetitionManager()
@@ -110,16 +258,66 @@ class Competition(models.Model):
         return self.is_started() and not self.is_over()
 
     def add_user_access(self, user):
-        if user not in self.players.all() and user.id != self.creator_id:
-            self.players.add(user)
-            signals.user_joined_competition.send(sender=self, user=user)
+        self.add_users_access([user])
 
     def remove_user_access(self, user):
-        if user.id == self.creator_id:
+        self.remove_users_access([user])
+
+    @transaction.atomic
+    def add_users_access(self, users):
+        """
+        Give access to the competition to the given users and return the list
+        of the users who were added, the ones who already had access being
+        ignored. This runs a constant number of queries however many users
+        are given.
+        """
+        user_ids = {user.id for user in users} - {self.creator_id}
+        new_users = list(get_user_model().objects
+                                         .filter(id__in=user_ids)
+                                         .exclude(competitions=self)
+                                         .select_related('profile')
+                                         .order_by('id'))
+
+        if not new_users:
+            return []
+
+        Membership = Competition.players.through
+        Membership.objects.bulk_create([
+            Membership(competition_id=self.id, user_id=user.id)
+            for user in new_users
+        ])
+
+        signals.users_joined_competition.send(sender=self, users=new_users)
+
+        return new_users
+
+    @transaction.atomic
+    def remove_users_access(self, users):
+        """
+        Remove the access to the competition of the given users and return
+        the list of the users who were removed. This runs a constant number
+        of queries however many users are given.
+        """
+        user_ids = {user.id for user in users}
+
+        if self.creator_id in user_ids:
             raise CannotLeaveCompetitionError()
 
-        self.players.remove(user)
-        signals.user_left_competition.send(sender=self, user=user)
+        removed_users = list(self.players.filter(id__in=user_ids)
+                                         .select_related('profile')
+                                         .order_by('id'))
+
+        if not removed_users:
+            return []
+
+        Competition.players.through.objects.filter(
+            competition_id=self.id,
+            user_id__in=[user.id for user in removed_users]
+        ).delete()
+
+        signals.users_left_competition.send(sender=self, users=removed_users)
+
+        return removed_users
 
     def get_games_played_by(self, player):
         """
@@ -137,15 +335,76 @@ class Competition(models.Model):
         try:
             score = self.get_score(player)
         except Score.DoesNotExist:
-            score = Score.objects.create(
-                player=player,
-                competition=self,
-                score=settings.GAME_INITIAL_MU,
-                stdev=settings.GAME_INITIAL_SIGMA
-            )
+            score = self.create_score(player)
 
         return score
 
+    def create_score(self, player):
+        """
+        Create the score of the player in the competition, or return the
+        existing one if it was created concurrently.
+        """
+        try:
+            # The savepoint allows to go on with the current transaction if
+            # the insert fails
+            with transaction.atomic():
+                return Score.objects.create(
+                    player=player,
+                    competition=self,
+                    score=settings.GAME_INITIAL_MU,
+                    stdev=settings.GAME_INITIAL_SIGMA
+                )
+        except IntegrityError:
+            return self.get_score(player)
+
+    def get_scores_for_update(self, players):
+        """
+        Lock the scores of the given players in the competition until the end
+        of the current transaction, creating the missing ones, and return them
+        as a dict {player_id: score}. Rows are always locked in the same
+        order so that concurrent announces can't deadlock.
+
+        The players and their profiles are fetched along with their scores,
+        and every score has a ``ranking`` attribute with the position of the
+        player before the missing scores were created, which is None if the
+        score was just created.
+        """
+        players_by_id = {player.id: player for player in players}
+
+        def lock_scores():
+            # Only the score rows are locked: Postgres can't lock the nullable
+            # side of the outer join to the profiles
+            scores = (Score.objects.with_ranking(self.ranking_field)
+                                   .select_for_update()
+                                   .filter(competition=self,
+                                           player_id__in=list(players_by_id))
+                                   .order_by('player_id'))
+
+            return {score.player_id: score for score in scores}
+
+        scores = lock_scores()
+        missing_player_ids = sorted(set(players_by_id) - set(scores))
+
+        if missing_player_ids:
+            # The new scores would count in the rankings of the existing ones
+            old_rankings = {player_id: score.ranking
+                            for player_id, score in scores.items()}
+
+            for player_id in missing_player_ids:
+                self.create_score(players_by_id[player_id])
+
+            scores = lock_scores()
+
+            for player_id, score in scores.items():
+                score.ranking = old_rankings.get(player_id)
+
+        players = (get_user_model().objects.select_related('profile')
+                                           .in_bulk(list(scores)))
+        for player_id, score in scores.items():
+            score.player = players[player_id]
+
+        return scores
+
     def get_wins(self, player):
         """
         Return the number of games won by the player in the competition.
@@ -176,27 +435,173 @@ class Competition(models.Model):
     def get_score_board(self):
         """
         Return sorted scores (highest to lowest) from players in the
-        competition.
+        competition, with their ``ranking``. Tied players share the same
+        ranking.
+        """
+        return (Score.objects.with_window_ranking(self.ranking_field)
+                             .filter(competition=self)
+                             .order_by('-' + self.ranking_field, '-player_id')
+                             .select_related('player__profile'))
+
+    def get_score_board_at(self, date_or_game_id):
+        """
+        Return the leaderboard (see ``build_leaderboard``) of the competition
+        as it was at the given date, or right after the game with the given
+        id.
         """
-        return (self.scores.order_by('-score')
-                           .select_related('player__profile'))
+        if isinstance(date_or_game_id, int):
+            game_id, date = date_or_game_id, None
+        else:
+            game_id, date = None, date_or_game_id
+
+        leaderboard = HistoricalScore.objects.get_leaderboard_at(
+            self.id, game_id=game_id, date=date, field=self.ranking_field
+        )
+
+        # Archived competitions have no historical scores left in the table,
+        # so the archive is only looked up when none was found
+        if leaderboard:
+            return leaderboard
+
+        archive = self.get_history_archive()
+        if archive is None:
+            return leaderboard
+
+        if date is not None:
+            game_ids = set(self.games.filter(date__lte=date)
+                                     .values_list('id', flat=True))
+        else:
+            game_ids = None
+
+        # Latest archived score of each player before the cutoff
+        last_scores = {}
+        for historical_score in archive.get_historical_scores():
+            archived_game_id = historical_score.game_id
+            if ((game_id is None or archived_game_id <= game_id) and
+                    (game_ids is None or archived_game_id in game_ids)):
+                last_scores[historical_score.player_id] = historical_score
+
+        players = get_user_model().objects.in_bulk(list(last_scores))
+
+        return build_leaderboard(
+            [
+                (player_id, players[player_id].first_name,
+                 players[player_id].last_name, players[player_id].username,
+                 historical_score.score, historical_score.stdev)
+                for player_id, historical_score in last_scores.items()
+            ],
+            self.ranking_field
+        )
+
+    @property
+    def ranking_field(self):
+        """
+        Name of the ``Score`` field the players are ranked by.
+        """
+        if self.ranking_order == self.RANKING_CONSERVATIVE:
+            return 'conservative_score'
+
+        return 'score'
 
     def get_ranking_by_player(self):
         """
         Return a dict {player: position} for every player in the ranking.
+        Tied players share the same position.
+        """
+        return {score.player: score.ranking
+                for score in self.get_score_board()}
+
+    def get_leaderboard_around(self, player, size=None):
+        """
+        Return the leaderboard entries of the player and of the ``size``
+        (``LEADERBOARD_AROUND_SIZE`` by default) players right above and
+        below them (see ``ScoreManager.get_leaderboard_around``).
+        """
+        if size is None:
+            size = settings.LEADERBOARD_AROUND_SIZE
+
+        return Score.objects.get_leaderboard_around(self.id, player.id, size,
+                                                    self.ranking_field)
+
+    def get_player_ranking(self, player):
+        """
+        Return the leaderboard entry (see ``build_leaderboard``) of the player
+        in the competition, or None if they have no score there.
+        """
+        return Score.objects.get_player_ranking(self.id, player.id,
+                                                self.ranking_field)
+
+    def get_history_archive(self):
+        """
+        Return the ``HistoryArchive`` of the competition, or None if its
+        historical scores are not archived.
+        """
+        try:
+            return self.history_archive
+        except HistoryArchive.DoesNotExist:
+            return None
+
+    def restore_history_archive(self):
+        """
+        Move the archived historical scores of the competition back to the
+        ``HistoricalScore`` table, if it's archived, so that its history can
+        be written again.
+        """
+        archive = HistoryArchive.objects.filter(competition=self).first()
+
+        if archive is not None:
+            archive.restore()
+
+    def get_snapshot(self):
         """
-        score_board = self.get_score_board()
+        Return the ``CompetitionSnapshot`` of the competition, or None if it's
+        not frozen.
+        """
+        try:
+            return self.snapshot
+        except ObjectDoesNotExist:
+            return None
+
+    def get_historical_scores_by_game(self, game_ids):
+        """
+        Return a dict {game_id: [historical_score, ...]} with the historical
+        scores of the given games, from the archive if the competition is
+        archived.
+        """
+        archive = self.get_history_archive()
+        historical_scores_by_game = {game_id: [] for game_id in game_ids}
+
+        if archive is not None:
+            historical_scores = archive.get_historical_scores()
+        else:
+            historical_scores = HistoricalScore.objects.filter(
+                game_id__in=game_ids
+            )
+
+        for historical_score in historical_scores:
+            if historical_score.game_id in historical_scores_by_game:
+                historical_scores_by_game[historical_score.game_id].append(
+                    historical_score
+                )
 
-        return dict(zip(
-            [score.player for score in score_board],
-            range(1, len(score_board) + 1)
-        ))
+        return historical_scores_by_game
 
     def get_last_score_for_player(self, player, last_game=None):
         """
         Returns the latest HistoricalScore before ``last_game`` for the given
         ``player``.
         """
+        archive = self.get_history_archive()
+
+        if archive is not None:
+            for historical_score in reversed(archive.get_historical_scores()):
+                if (historical_score.player_id == player.id and
+                        (not last_game or
+                         historical_score.game_id < last_game.id)):
+                    return historical_score
+
+            return None
+
         last_score = (player.historical_scores
                             .filter(game__competition=self)
                             .order_by('-id'))
@@ -206,8 +611,131 @@ class Competition(models.Model):
 
         return last_score.first()
 
+    def get_ratings_at(self, game_id):
+        """
+        Return a dict {player_id: Rating} with the ratings of the players of
+        the competition right after the game ``game_id``.
+        """
+        return get_ratings_at(self, game_id)
+
     def get_latest_games(self, n=20):
         """
         Return the latest ``n`` games in the competition.
         """
         return self.games.get_latest(n)
+
+    def get_changes_since(self, last_game_id, max_games):
+        """
+        Return the changes in the competition since the game
+        ``last_game_id`` as a dict with the new games, the new scores of the
+        players who played them and their rank moves, up to the first game
+        that isn't rated yet. Return None if more than ``max_games`` games
+        were played since then, in which case the whole leaderboard should be
+        fetched again.
+
+        Only the players who played are reported in the rank moves, the
+        positions of the other players can be deduced from the new scores.
+        """
+        games = list(self.games.filter(id__gt=last_game_id)
+                               .order_by('id')[:max_games + 1])
+
+        # The changes stop right before the first pending game, so that the
+        # client asks for it again once it's rated
+        for index, game in enumerate(games):
+            if not game.is_scored:
+                games = games[:index]
+                break
+
+        if len(games) > max_games:
+            return None
+
+        if not games:
+            return {'games': [], 'scores': [], 'rank_moves': []}
+
+        player_ids = ({game.winner_id for game in games} |
+                      {game.loser_id for game in games})
+        scores = list(self.scores.filter(player_id__in=player_ids)
+                                 .select_related('player__profile'))
+
+        # Latest score of each player before the new games, as the value
+        # of the ranking field
+        old_scores = {
+            player_id: get_ranking_value(self.ranking_field, score, stdev)
+            for player_id, score, stdev in (
+                HistoricalScore.objects
+                .filter(player_id__in=player_ids, game__competition=self,
+                        game_id__lte=last_game_id)
+                .order_by('player_id', '-game_id')
+                .distinct('player_id')
+                .values_list('player_id', 'score', 'stdev')
+            )
+        }
+
+        return {
+            'games': games,
+            'scores': scores,
+            'rank_moves': self._get_rank_moves(scores, old_scores),
+        }
+
+    def _get_rank_moves(self, scores, old_scores):
+        """
+        Return the list of rank moves of the players of the given ``scores``,
+        ``old_scores`` being a dict {player_id: value} of the values of their
+        ranking field before the moves. All the ranks are counted in a single
+        query.
+        """
+        field = self.ranking_field
+        player_ids = [score.player_id for score in scores]
+        aggregates = {}
+
+        def count_above(condition):
+            return Sum(Case(When(condition, then=Value(1)), default=Value(0),
+                            output_field=IntegerField()))
+
+        for score in scores:
+            aggregates['new_%d' % score.player_id] = count_above(
+                Q(**{field + '__gt': getattr(score, field)})
+            )
+
+            if score.player_id in old_scores:
+                aggregates['old_%d' % score.player_id] = count_above(
+                    Q(**{field + '__gt': old_scores[score.player_id]}) &
+                    ~Q(player_id__in=player_ids)
+                )
+
+        counts = self.scores.aggregate(**aggregates)
+        rank_moves = []
+
+        for score in scores:
+            new_ranking = (counts['new_%d' % score.player_id] or 0) + 1
+
+            if score.player_id in old_scores:
+                old_score = old_scores[score.player_id]
+                # The other players of the moves are excluded from the query
+                # since their current score isn't the one they had before
+                old_ranking = (
+                    (counts['old_%d' % score.player_id] or 0) + 1 +
+                    sum(1 for player_id, other_old_score in old_scores.items()
+                        if player_id != score.player_id and
+                        other_old_score > old_score)
+                )
+            else:
+                old_ranking = None
+
+            if old_ranking != new_ranking:
+                rank_moves.append({
+                    'player_id': score.player_id,
+                    'old_ranking': old_ranking,
+                    'new_ranking': new_ranking,
+                })
+
+        return rank_moves
+
+
+@receiver(post_save, sender=Competition)
+def restore_history_of_reopened_competition(sender, instance, created,
+                                            **kwargs):
+    # Archived competitions only read their history from the archive, which
+    # new games can't be added to
+    if not created and not instance.is_over():
+        instance.restore_history_archive()
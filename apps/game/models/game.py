@@ -5,7 +5,43 @@ from django.utils import timezone
 
 from .. import signals
 from ..exceptions import InactiveCompetitionError
-from .score import update_players_scores
+from .checkpoint import RatingCheckpoint, replay_from
+from .score import Score, update_players_scores
+from .summary import PlayerSummary
+
+
+def send_ranking_changes(competition, old_rankings, new_rankings,
+                         players_games):
+    """
+    Send the ``ranking_changed`` signal for every player of the
+    ``players_games`` list of (player, game) tuples whose position changed
+    between the ``old_rankings`` and the ``new_rankings`` dicts {player_id:
+    position}, then send the ``rankings_changed`` signal with all the
+    changes at once.
+    """
+    changes = []
+
+    for player, game in players_games:
+        old_ranking = old_rankings.get(player.id)
+        new_ranking = new_rankings[player.id]
+
+        if old_ranking != new_ranking:
+            signals.ranking_changed.send(
+                sender=game,
+                player=player,
+                old_ranking=old_ranking,
+                new_ranking=new_ranking,
+                competition=competition
+            )
+            changes.append({
+                'game': game,
+                'player': player,
+                'old_ranking': old_ranking,
+                'new_ranking': new_ranking,
+            })
+
+    if changes:
+        signals.rankings_changed.send(sender=competition, changes=changes)
 
 
 class GameManager(models.Manager):
@@ -33,10 +69,40 @@ class GameManager(models.Manager):
         if not competition.is_active():
             raise InactiveCompetitionError()
 
+        if competition.deferred_scoring:
+            # The game is rated later on by the competition scorer (see
+            # ``apps.game.scoring``)
+            # ``game_played`` is sent once the game is rated
+            return self.create(winner=winner, loser=loser,
+                               competition=competition, is_scored=False)
+
+        # Lock the scores before creating the game so that concurrent games
+        # of the same players are rated in the order of their ids. The
+        # players are replaced by the ones loaded with their profiles
+        scores = competition.get_scores_for_update([winner, loser])
+        winner = scores[winner.id].player
+        loser = scores[loser.id].player
         game = self.create(winner=winner, loser=loser, competition=competition)
 
         signals.game_played.send(sender=game)
-        game.update_score()
+
+        old_rankings = {player_id: score.ranking
+                        for player_id, score in scores.items()
+                        if score.ranking is not None}
+        deltas = update_players_scores(winner, loser, game, scores)
+        new_rankings = Score.objects.get_rankings(
+            competition.id, scores, competition.ranking_field
+        )
+        send_ranking_changes(competition, old_rankings, new_rankings,
+                             [(winner, game), (loser, game)])
+
+        RatingCheckpoint.objects.create_if_due(game)
+
+        # The summaries are locked too, so they're only updated once the
+        # scores are released
+        transaction.on_commit(
+            lambda: PlayerSummary.objects.record_game(game, deltas)
+        )
 
         return game
 
@@ -46,11 +112,17 @@ class Game(models.Model):
                                related_name='games_won')
     loser = models.ForeignKey(settings.AUTH_USER_MODEL,
                               related_name='games_lost')
-    date = models.DateTimeField(default=timezone.now)
+    date = models.DateTimeField(default=timezone.now, db_index=True)
     competition = models.ForeignKey('Competition', related_name='games')
+    is_scored = models.BooleanField(default=True)
 
     objects = GameManager()
 
+    class Meta:
+        index_together = (
+            ('competition', 'id'),
+        )
+
     def clean(self):
         if (self.winner_id is not None and self.loser_id is not None and
                 self.winner_id == self.loser_id):
@@ -67,8 +139,30 @@ class Game(models.Model):
 
     def delete(self):
         """
-        Delete the game object and handle related score deletion.
+        Delete the game object and handle related score deletion. If other
+        games were played after this one in the competition, they're replayed
+        from the nearest checkpoint.
         """
+        # Pending games didn't change any score yet
+        if not self.is_scored:
+            super().delete()
+            return
+
+        # The history of the competition is rewritten below
+        self.competition.restore_history_archive()
+
+        if self.competition.games.filter(id__gt=self.id,
+                                         is_scored=True).exists():
+            game_id = self.id
+
+            with transaction.atomic():
+                super().delete()
+                replay_from(self.competition, game_id)
+                PlayerSummary.objects.rebuild([self.winner_id,
+                                               self.loser_id])
+
+            return
+
         for player in [self.winner, self.loser]:
             historical_score = self.competition.get_last_score_for_player(
                 player, self
@@ -88,31 +182,32 @@ class Game(models.Model):
 
         self.historical_scores.all().delete()
         super().delete()
+        PlayerSummary.objects.rebuild([self.winner_id, self.loser_id])
 
+    @transaction.atomic
     def update_score(self, notify=True):
         """
         Update players scores. This method should be called when a new game is
         created.
         """
+        players = [self.winner, self.loser]
+
         if notify:
-            old_rankings = self.competition.get_ranking_by_player()
+            old_rankings = Score.objects.get_rankings(
+                self.competition_id, [player.id for player in players],
+                self.competition.ranking_field
+            )
 
-        update_players_scores(self.winner, self.loser, self)
+        deltas = update_players_scores(self.winner, self.loser, self)
+        PlayerSummary.objects.record_game(self, deltas)
 
         if notify:
-            new_rankings = self.competition.get_ranking_by_player()
-
-            for player in [self.winner, self.loser]:
-                if (player not in old_rankings or
-                        old_rankings[player] != new_rankings[player]):
-                    signals.ranking_changed.send(
-                        sender=self,
-                        player=player,
-                        old_ranking=(old_rankings[player]
-                                     if player in old_rankings else None),
-                        new_ranking=new_rankings[player],
-                        competition=self.competition
-                    )
+            new_rankings = Score.objects.get_rankings(
+                self.competition_id, [player.id for player in players],
+                self.competition.ranking_field
+            )
+            send_ranking_changes(self.competition, old_rankings, new_rankings,
+                                 [(player, self) for player in players])
 
     def get_opponent(self, player):
         """
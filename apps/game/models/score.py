@@ -1,8 +1,280 @@
+import uuid
+
 from django.conf import settings
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models import Case, IntegerField, Sum, Value, When
 
 from trueskill import Rating, rate_1vs1
 
+from ...user.models import get_display_name
+
+
+LEADERBOARD_FIELDS = ('player_id', 'player__first_name', 'player__last_name',
+                      'player__username', 'score', 'stdev')
+
+
+def build_leaderboard(rows, field='score'):
+    """
+    Return a list of dicts with the rank, player id, display name, mu and
+    sigma of every player from the given ``LEADERBOARD_FIELDS`` rows, sorted
+    from the highest to the lowest value of the given ranking ``field`` (see
+    ``RANKING_FIELDS``), then by descending player id. Tied players share the
+    same rank, the next rank being skipped, like with the SQL ``RANK()``
+    function.
+    """
+    leaderboard = []
+    previous_value = None
+    ranked_rows = sorted(
+        ((get_ranking_value(field, row[4], row[5]), row) for row in rows),
+        key=lambda ranked_row: (ranked_row[0], ranked_row[1][0]),
+        reverse=True
+    )
+
+    for position, (value, row) in enumerate(ranked_rows, start=1):
+        if leaderboard and previous_value == value:
+            rank = leaderboard[-1]['rank']
+        else:
+            rank = position
+
+        leaderboard.append(get_leaderboard_entry(rank, *row))
+        previous_value = value
+
+    return leaderboard
+
+
+def get_leaderboard_entry(rank, player_id, first_name, last_name, username,
+                          mu, sigma):
+    return {
+        'rank': rank,
+        'player_id': player_id,
+        'name': get_display_name(first_name, last_name, username),
+        'mu': mu,
+        'sigma': sigma,
+    }
+
+
+def get_conservative_score(mu, sigma):
+    """
+    Return the conservative estimation of the skill of a player, which only
+    gets high once the system is confident about it.
+    """
+    return mu - settings.CONSERVATIVE_RATING_FACTOR * sigma
+
+
+# Fields the scores of a competition can be ranked by, both are indexed along
+# with the competition and the player, which breaks ties in the leaderboards
+RANKING_FIELDS = ('score', 'conservative_score')
+
+
+def get_ranking_value(field, mu, sigma):
+    """
+    Return the value of the given ranking ``field`` (see ``RANKING_FIELDS``)
+    for a score with the given mu and sigma.
+    """
+    check_ranking_field(field)
+
+    if field == 'conservative_score':
+        return get_conservative_score(mu, sigma)
+
+    return mu
+
+
+# Position of the score in its competition, tied scores share the same
+# position. This gives the same result as ``RANKED_SCORES_SQL`` but only
+# counts the scores above the given one with the (competition, field, player)
+# index, which is cheaper for a couple of scores
+RANKING_SQL = (
+    'SELECT COUNT(*) + 1 FROM {table} AS higher_score'
+    ' WHERE higher_score.competition_id = {table}.competition_id'
+    ' AND higher_score.{field} > {table}.{field}'
+)
+
+# Position of the score among the scores selected by the query, which must
+# only be filtered on their competition
+WINDOW_RANKING_SQL = 'RANK() OVER (ORDER BY {table}.{field} DESC)'
+
+# Ranked scores of a competition, along with the player names
+RANKED_SCORES_SQL = (
+    'SELECT RANK() OVER (ORDER BY score.{field} DESC) AS ranking,'
+    ' score.player_id, player.first_name, player.last_name, player.username,'
+    ' score.score, score.stdev'
+    ' FROM {score_table} AS score'
+    ' INNER JOIN {user_table} AS player ON player.id = score.player_id'
+    ' WHERE score.competition_id = %s'
+)
+
+# Update of the scores of a competition from a list of (player_id, mu, sigma,
+# conservative score) rows, returning the ids of the updated players
+SAVE_RATINGS_SQL = (
+    'UPDATE {table} SET score = ratings.score, stdev = ratings.stdev,'
+    ' conservative_score = ratings.conservative_score'
+    ' FROM (VALUES {values})'
+    ' AS ratings (player_id, score, stdev, conservative_score)'
+    ' WHERE {table}.competition_id = %s'
+    ' AND {table}.player_id = ratings.player_id'
+    ' RETURNING {table}.player_id'
+)
+SAVE_RATINGS_BATCH_SIZE = 1000
+
+
+def check_ranking_field(field):
+    # Ranking fields are part of raw SQL queries
+    if field not in RANKING_FIELDS:
+        raise ValueError("Unknown ranking field: %s" % field)
+
+
+class ScoreManager(models.Manager):
+    def with_ranking(self, field='score'):
+        """
+        Return a queryset of scores annotated with their ``ranking`` in their
+        competition, ranked by the given field (see ``RANKING_FIELDS``).
+        """
+        check_ranking_field(field)
+
+        return self.get_queryset().extra(select={
+            'ranking': RANKING_SQL.format(table=self.model._meta.db_table,
+                                          field=field)
+        })
+
+    def with_window_ranking(self, field='score'):
+        """
+        Same as ``with_ranking`` but the ``ranking`` is computed by
+        ``RANK()`` over the selected scores in a single pass, which is
+        cheaper for a whole leaderboard. The queryset must only be filtered
+        on the competition for the rankings to be right.
+        """
+        check_ranking_field(field)
+
+        return self.get_queryset().extra(select={
+            'ranking': WINDOW_RANKING_SQL.format(
+                table=self.model._meta.db_table, field=field
+            )
+        })
+
+    def get_rankings(self, competition_id, player_ids=None, field='score'):
+        """
+        Return a dict {player_id: ranking} of the given players of the
+        competition, or of all its players if ``player_ids`` is None, in a
+        single query.
+        """
+        if player_ids is not None:
+            return dict(
+                self.with_ranking(field)
+                    .filter(competition_id=competition_id,
+                            player_id__in=list(player_ids))
+                    .values_list('player_id', 'ranking')
+            )
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                'SELECT player_id, ranking FROM ({ranked_scores}) AS ranked'
+                .format(ranked_scores=self._get_ranked_scores_sql(field)),
+                [competition_id]
+            )
+
+            return dict(cursor.fetchall())
+
+    def get_player_ranking(self, competition_id, player_id, field='score'):
+        """
+        Return the leaderboard entry (see ``build_leaderboard``) of the player
+        in the competition, or None if they have no score there.
+        """
+        sql = ('SELECT * FROM ({ranked_scores}) AS ranked'
+               ' WHERE player_id = %s'
+               .format(ranked_scores=self._get_ranked_scores_sql(field)))
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, [competition_id, player_id])
+            row = cursor.fetchone()
+
+        return get_leaderboard_entry(*row) if row is not None else None
+
+    def get_leaderboard(self, competition_id, offset=0, limit=None,
+                        field='score'):
+        """
+        Return the leaderboard of the given competition (see
+        ``build_leaderboard``), or the ``limit`` entries after the first
+        ``offset`` ones. Ranks are computed by the database, so a slice
+        doesn't need to load the whole leaderboard. Negative offsets and
+        limits are handled as 0, which Postgres would reject.
+        """
+        sql = (self._get_ranked_scores_sql(field) +
+               ' ORDER BY score.{field} DESC, score.player_id DESC OFFSET %s'
+               .format(field=field))
+        params = [competition_id, max(offset, 0)]
+
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(max(limit, 0))
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+
+            return [get_leaderboard_entry(*row) for row in cursor.fetchall()]
+
+    def get_leaderboard_around(self, competition_id, player_id, size,
+                               field='score'):
+        """
+        Return the leaderboard entries (see ``build_leaderboard``) of the
+        player and of the ``size`` players right above and below them in the
+        competition, or an empty list if the player has no score there.
+
+        The neighbours are fetched with (field, player id) row comparisons in
+        both directions, which walk the (competition, field, player) index, so
+        only the returned scores are read whatever the size of the
+        leaderboard. Their ranks are counted in a single aggregate query over
+        the scores above them, which is O(rank) rather than O(size of the
+        leaderboard).
+        """
+        check_ranking_field(field)
+        # The value of the ranking field comes last in the rows
+        fields = LEADERBOARD_FIELDS + (field,)
+        scores = self.get_queryset().filter(competition_id=competition_id)
+        row = scores.filter(player_id=player_id).values_list(*fields).first()
+
+        if row is None:
+            return []
+
+        value = row[-1]
+        # Scores after or before the player in the (field, player id) order
+        keyset = ('("{table}"."{field}", "{table}"."player_id") {{}} (%s, %s)'
+                  .format(table=self.model._meta.db_table, field=field))
+        above = (scores.extra(where=[keyset.format('>')],
+                              params=[value, player_id])
+                       .order_by(field, 'player_id')
+                       .values_list(*fields)[:size])
+        below = (scores.extra(where=[keyset.format('<')],
+                              params=[value, player_id])
+                       .order_by('-' + field, '-player_id')
+                       .values_list(*fields)[:size])
+        rows = list(above)[::-1] + [row] + list(below)
+
+        # The rank of a score is 1 + the number of scores above it
+        values = sorted({row[-1] for row in rows})
+        counts = scores.filter(**{field + '__gt': values[0]}).aggregate(**{
+            'above_%d' % index: Sum(Case(
+                When(**{field + '__gt': value, 'then': Value(1)}),
+                default=Value(0), output_field=IntegerField()
+            ))
+            for index, value in enumerate(values)
+        })
+        ranks = {value: (counts['above_%d' % index] or 0) + 1
+                 for index, value in enumerate(values)}
+
+        return [get_leaderboard_entry(ranks[row[-1]], *row[:-1])
+                for row in rows]
+
+    def _get_ranked_scores_sql(self, field):
+        check_ranking_field(field)
+
+        return RANKED_SCORES_SQL.format(
+            field=field,
+            score_table=self.model._meta.db_table,
+            user_table=get_user_model()._meta.db_table
+        )
+
 
 class Score(models.Model):
     competition = models.ForeignKey('Competition', related_name='scores')
@@ -10,17 +282,30 @@ class Score(models.Model):
     score = models.FloatField('skills', default=settings.GAME_INITIAL_MU)
     stdev = models.FloatField('standard deviation',
                               default=settings.GAME_INITIAL_SIGMA)
+    # Kept up to date with the score and standard deviation
+    conservative_score = models.FloatField('conservative skills')
+
+    objects = ScoreManager()
 
     class Meta:
         unique_together = (
             ('competition', 'player'),
         )
+        index_together = (
+            ('competition', 'score', 'player'),
+            ('competition', 'conservative_score', 'player'),
+        )
 
     def __str__(self):
         return '[%s] %s: mu = %s, s = %s' % (self.competition.name,
                                              self.player.get_full_name(),
                                              self.score, self.stdev)
 
+    def save(self, *args, **kwargs):
+        self.conservative_score = get_conservative_score(self.score,
+                                                         self.stdev)
+        super().save(*args, **kwargs)
+
 
 class HistoricalScoreManager(models.Manager):
     def get_latest(self, nb_games, competition):
@@ -29,6 +314,31 @@ class HistoricalScoreManager(models.Manager):
                 .filter(game__competition=competition)
                 .order_by('-id')[:nb_games])
 
+    def get_leaderboard_at(self, competition_id, game_id=None, date=None,
+                           field='score'):
+        """
+        Return the leaderboard of the given competition (see
+        ``build_leaderboard``) ranked by the given ``field``, as it was right
+        after the game ``game_id`` or at the given ``date``. The latest score
+        of each player is fetched in a single DISTINCT ON query using the
+        (player, game) index.
+        """
+        historical_scores = self.get_queryset().filter(
+            game__competition_id=competition_id
+        )
+
+        if game_id is not None:
+            historical_scores = historical_scores.filter(game_id__lte=game_id)
+
+        if date is not None:
+            historical_scores = historical_scores.filter(game__date__lte=date)
+
+        rows = (historical_scores.order_by('player_id', '-game_id')
+                                 .distinct('player_id')
+                                 .values_list(*LEADERBOARD_FIELDS))
+
+        return build_leaderboard(rows, field)
+
     def get_default(self):
         return HistoricalScore(
             score=settings.GAME_INITIAL_MU,
@@ -52,36 +362,121 @@ class HistoricalScore(models.Model):
         )
 
 
-def update_players_scores(winner, loser, game):
+def update_players_scores(winner, loser, game, scores=None):
     """
     Compute the new score of the winner and the loser, update their scores and
-    create ``HistoricalScore`` objects.
+    create ``HistoricalScore`` objects, and return the dict {player_id: score
+    change} to add to the summaries of the players (see
+    ``PlayerSummaryManager.record_game``). ``scores`` is the dict {player_id:
+    score} of the locked scores of both players (see
+    ``Competition.get_scores_for_update``), they're locked here if it's not
+    given. This must be called in a transaction.
     """
-    winner_score = game.competition.get_or_create_score(winner)
-    loser_score = game.competition.get_or_create_score(loser)
+    if scores is None:
+        scores = game.competition.get_scores_for_update([winner, loser])
+
+    winner_score = scores[winner.id]
+    loser_score = scores[loser.id]
 
     winner_new_score, loser_new_score = rate_1vs1(
         Rating(winner_score.score, winner_score.stdev),
         Rating(loser_score.score, loser_score.stdev)
     )
 
-    update_player_score(winner_score, winner_new_score, game)
-    update_player_score(loser_score, loser_new_score, game)
+    historical_scores = []
+    deltas = {}
+    for score, new_score in ((winner_score, winner_new_score),
+                             (loser_score, loser_new_score)):
+        deltas[score.player_id] = new_score.mu - score.score
+        score.score = new_score.mu
+        score.stdev = new_score.sigma
+        score.save(update_fields=['score', 'stdev', 'conservative_score'])
+
+        historical_scores.append(HistoricalScore(
+            game=game,
+            score=score.score,
+            stdev=score.stdev,
+            player_id=score.player_id,
+        ))
 
+    HistoricalScore.objects.bulk_create(historical_scores)
 
-def update_player_score(old_score, new_score, game):
+    return deltas
+
+
+def replay_games(games, ratings, initial_rating):
     """
-    Update the player score with the new TrueSkill score. The ``game``
-    parameter is used to track the game the update is coming from to create the
-    ``HistoricalScore`` object.
+    Rate the given ``(game_id, winner_id, loser_id)`` games in order, updating
+    the ``ratings`` dict {player_id: Rating} in place, and return the list of
+    ``HistoricalScore`` objects (not saved) of the games.
     """
-    old_score.score = new_score.mu
-    old_score.stdev = new_score.sigma
-    old_score.save()
-
-    HistoricalScore.objects.create(
-        game=game,
-        score=old_score.score,
-        stdev=old_score.stdev,
-        player=old_score.player,
+    historical_scores = []
+
+    for game_id, winner_id, loser_id in games:
+        winner_rating, loser_rating = rate_1vs1(
+            ratings.get(winner_id, initial_rating),
+            ratings.get(loser_id, initial_rating)
+        )
+        ratings[winner_id] = winner_rating
+        ratings[loser_id] = loser_rating
+
+        historical_scores.extend([
+            HistoricalScore(game_id=game_id, player_id=winner_id,
+                            score=winner_rating.mu,
+                            stdev=winner_rating.sigma),
+            HistoricalScore(game_id=game_id, player_id=loser_id,
+                            score=loser_rating.mu,
+                            stdev=loser_rating.sigma),
+        ])
+
+    return historical_scores
+
+
+def get_scores_version_cache_key(competition_id):
+    return 'game:scores-version:%d' % competition_id
+
+
+def invalidate_scores_version(competition_id):
+    """
+    Replace the token that identifies the scores of the competition (see
+    ``apps.game.prediction``) once the current transaction is committed. This
+    is needed when the scores are rewritten without a new game being scored.
+    """
+    cache_key = get_scores_version_cache_key(competition_id)
+    transaction.on_commit(
+        lambda: cache.set(cache_key, uuid.uuid4().hex, None)
     )
+
+
+def save_ratings(competition_id, ratings):
+    """
+    Set the scores of the competition to the given ``ratings`` dict
+    {player_id: Rating}, creating the missing scores. The existing scores are
+    updated with a single query per ``SAVE_RATINGS_BATCH_SIZE`` ratings.
+    """
+    rows = [(player_id, rating.mu, rating.sigma,
+             get_conservative_score(rating.mu, rating.sigma))
+            for player_id, rating in ratings.items()]
+    existing_player_ids = set()
+
+    with connections[Score.objects.db].cursor() as cursor:
+        for start in range(0, len(rows), SAVE_RATINGS_BATCH_SIZE):
+            batch = rows[start:start + SAVE_RATINGS_BATCH_SIZE]
+            cursor.execute(
+                SAVE_RATINGS_SQL.format(
+                    table=Score._meta.db_table,
+                    values=', '.join(['(%s, %s, %s, %s)'] * len(batch))
+                ),
+                [value for row in batch for value in row] + [competition_id]
+            )
+            existing_player_ids.update(
+                player_id for player_id, in cursor.fetchall()
+            )
+
+    Score.objects.bulk_create([
+        Score(competition_id=competition_id, player_id=player_id,
+              score=mu, stdev=sigma, conservative_score=conservative_score)
+        for player_id, mu, sigma, conservative_score in rows
+        if player_id not in existing_player_ids
+    ])
+    invalidate_scores_version(competition_id)
@@ -0,0 +1,44 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .competition import Competition
+from .game import Game
+
+
+class CompetitionSnapshotManager(models.Manager):
+    def thaw(self, competition_id):
+        """
+        Delete the snapshot of the competition so that its pages are computed
+        from its games again. Writes that don't send the model signals (bulk
+        creations and updates) must call this themselves.
+        """
+        self.get_queryset().filter(competition_id=competition_id).delete()
+
+
+class CompetitionSnapshot(models.Model):
+    """
+    Precomputed pages data of a finished competition (see
+    ``apps.game.snapshot``).
+    """
+    competition = models.OneToOneField('Competition', related_name='snapshot')
+    data = JSONField(default=dict)
+    date = models.DateTimeField(auto_now_add=True)
+
+    objects = CompetitionSnapshotManager()
+
+
+@receiver(post_save, sender=Competition)
+def thaw_changed_competition(sender, instance, created, **kwargs):
+    if not created:
+        CompetitionSnapshot.objects.thaw(instance.id)
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def thaw_competition_of_changed_game(sender, instance, **kwargs):
+    # Only finished competitions can be frozen, this avoids a query for every
+    # game announced in an active competition
+    if instance.competition.is_over():
+        CompetitionSnapshot.objects.thaw(instance.competition_id)
@@ -0,0 +1,213 @@
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.core.cache import cache
+from django.db import (
+    IntegrityError, connections, models, router, transaction
+)
+
+
+# Wins and losses of the players against each of their opponents, from the
+# point of view of both the winner and the loser of every rated game. The
+# pending games of a competition up to a given game id count as rated, since
+# they're flagged only once their whole batch is rated
+RATED_GAME_SQL = '(is_scored OR (competition_id = %s AND id <= %s))'
+PLAYER_RESULTS_SQL = (
+    'SELECT player_id, opponent_id, SUM(won), COUNT(*) - SUM(won) FROM ('
+    'SELECT winner_id AS player_id, loser_id AS opponent_id, 1 AS won'
+    ' FROM {game} WHERE ' + RATED_GAME_SQL + ' AND winner_id = ANY(%s)'
+    ' UNION ALL '
+    'SELECT loser_id, winner_id, 0'
+    ' FROM {game} WHERE ' + RATED_GAME_SQL + ' AND loser_id = ANY(%s)'
+    ') AS results GROUP BY player_id, opponent_id'
+)
+
+# Score changes of the latest games of the players, oldest first
+PLAYER_TREND_SQL = (
+    'SELECT player_id, delta FROM ('
+    'SELECT historical_score.player_id, historical_score.game_id,'
+    ' historical_score.score - LAG(historical_score.score, 1,'
+    ' CAST(%s AS double precision)) OVER ('
+    'PARTITION BY historical_score.player_id, game.competition_id'
+    ' ORDER BY historical_score.game_id) AS delta,'
+    ' ROW_NUMBER() OVER (PARTITION BY historical_score.player_id'
+    ' ORDER BY historical_score.game_id DESC) AS position'
+    ' FROM {historical_score} AS historical_score'
+    ' INNER JOIN {game} AS game ON game.id = historical_score.game_id'
+    ' WHERE historical_score.player_id = ANY(%s)'
+    ') AS deltas WHERE position <= %s ORDER BY player_id, game_id'
+)
+
+
+def get_player_summary_cache_key(player_id):
+    return 'game:player-summary:%d' % player_id
+
+
+def invalidate_player_summaries(player_ids):
+    """
+    Remove the cached overviews of the given players (see
+    ``apps.game.summary``) once the current transaction is committed.
+    """
+    cache_keys = [get_player_summary_cache_key(player_id)
+                  for player_id in player_ids]
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+class PlayerSummaryManager(models.Manager):
+    @transaction.atomic
+    def rebuild(self, player_ids, game=None):
+        """
+        Replace the summaries of the given players with new ones computed
+        from all their rated games, and return them. ``game`` is the game
+        being rated, if any: it counts as rated along with the pending games
+        of its competition before it. The results and the trends of all the
+        players are fetched with a query each, from the primary database
+        since the summaries are written there.
+        """
+        player_ids = list(player_ids)
+        if not player_ids:
+            return []
+
+        tables = {
+            'game': apps.get_model('game', 'Game')._meta.db_table,
+            'historical_score': apps.get_model(
+                'game', 'HistoricalScore'
+            )._meta.db_table,
+        }
+        summaries = {player_id: self.model(player_id=player_id)
+                     for player_id in player_ids}
+        rated_game_params = ([game.competition_id, game.id] if game
+                             else [None, None])
+
+        with connections[router.db_for_write(self.model)].cursor() as cursor:
+            cursor.execute(PLAYER_RESULTS_SQL.format(**tables),
+                           rated_game_params + [player_ids] +
+                           rated_game_params + [player_ids])
+
+            for player_id, opponent_id, wins, losses in cursor.fetchall():
+                summary = summaries[player_id]
+                summary.wins += int(wins)
+                summary.losses += int(losses)
+                summary.opponents[str(opponent_id)] = [int(wins), int(losses)]
+
+            cursor.execute(PLAYER_TREND_SQL.format(**tables), [
+                settings.GAME_INITIAL_MU, player_ids,
+                settings.PLAYER_SUMMARY_TREND_SIZE
+            ])
+
+            for player_id, delta in cursor.fetchall():
+                summaries[player_id].trend.append(delta)
+
+        self.get_queryset().filter(player_id__in=player_ids).delete()
+        self.bulk_create(summaries.values())
+        invalidate_player_summaries(player_ids)
+
+        return [summaries[player_id] for player_id in player_ids]
+
+    def get_or_rebuild(self, player_id, for_update=False, game=None):
+        """
+        Return a tuple (summary, rebuilt) with the summary of the given
+        player, built from their games if they don't have one yet (see
+        ``rebuild`` for ``game``). Missing summaries are built on the primary
+        database even if the reads go to the replica.
+        """
+        summaries = self.get_queryset()
+        if for_update:
+            summaries = summaries.select_for_update()
+
+        summary = summaries.filter(player_id=player_id).first()
+        if summary is not None:
+            return summary, False
+
+        db = router.db_for_write(self.model)
+
+        try:
+            with transaction.atomic(using=db):
+                return self.rebuild([player_id], game)[0], True
+        except IntegrityError:
+            # The summary has just been built by a concurrent transaction
+            return summaries.using(db).get(player_id=player_id), False
+
+    @transaction.atomic
+    def record_game(self, game, deltas):
+        """
+        Add the result of the rated ``game`` to the summaries of its players,
+        ``deltas`` being the dict {player_id: score change} of the game. The
+        summaries are locked in the order of the player ids until the end of
+        the transaction.
+        """
+        player_ids = sorted((game.winner_id, game.loser_id))
+        summaries = {
+            summary.player_id: summary
+            for summary in self.get_queryset()
+                               .select_for_update()
+                               .filter(player_id__in=player_ids)
+                               .order_by('player_id')
+        }
+
+        for player_id in player_ids:
+            if player_id not in summaries:
+                summary, rebuilt = self.get_or_rebuild(
+                    player_id, for_update=True, game=game
+                )
+
+                # Rebuilt summaries already include the game
+                if rebuilt:
+                    continue
+
+                summaries[player_id] = summary
+
+            won = player_id == game.winner_id
+            summary = summaries[player_id]
+            summary.add_result(game.loser_id if won else game.winner_id, won,
+                               deltas[player_id])
+            summary.save(update_fields=['wins', 'losses', 'opponents',
+                                        'trend'])
+
+        invalidate_player_summaries(player_ids)
+
+
+class PlayerSummary(models.Model):
+    """
+    Results of a player across all the competitions, updated with every game
+    they play (see ``apps.game.summary`` for the full overview).
+    """
+    player = models.OneToOneField(settings.AUTH_USER_MODEL,
+                                  related_name='summary')
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    # {opponent_id: [wins, losses]}
+    opponents = JSONField(default=dict)
+    # Score changes of the latest ``PLAYER_SUMMARY_TREND_SIZE`` games, oldest
+    # first
+    trend = JSONField(default=list)
+
+    objects = PlayerSummaryManager()
+
+    def add_result(self, opponent_id, won, delta):
+        results = self.opponents.setdefault(str(opponent_id), [0, 0])
+
+        if won:
+            self.wins += 1
+            results[0] += 1
+        else:
+            self.losses += 1
+            results[1] += 1
+
+        self.trend = (self.trend +
+                      [delta])[-settings.PLAYER_SUMMARY_TREND_SIZE:]
+
+    def get_favourite_opponent(self):
+        """
+        Return a tuple (opponent_id, wins, losses) of the opponent the player
+        played the most games against, or None if they didn't play yet.
+        """
+        if not self.opponents:
+            return None
+
+        opponent_id, (wins, losses) = max(
+            self.opponents.items(),
+            key=lambda item: (sum(item[1]), -int(item[0]))
+        )
+
+        return int(opponent_id), wins, losses
@@ -0,0 +1,190 @@
+from bisect import bisect_right
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from trueskill import Rating, global_env, quality_1vs1, rate_1vs1
+
+from .models import Competition, Game, Score
+from .models.score import get_ranking_value, get_scores_version_cache_key
+
+# {competition_id: (version, snapshot)}, see get_scores_snapshot
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+class ScoresSnapshot:
+    """
+    In-memory copy of the scores of a competition, used to simulate games
+    without touching the database. Players are ranked by the given ranking
+    ``field`` (see ``RANKING_FIELDS``).
+    """
+    def __init__(self, ratings, field='score'):
+        self.ratings = ratings
+        self.field = field
+        self.sorted_values = sorted(self.get_ranking_value(rating)
+                                    for rating in ratings.values())
+
+    def get_rating(self, player_id):
+        return self.ratings.get(player_id, Rating(settings.GAME_INITIAL_MU,
+                                                  settings.GAME_INITIAL_SIGMA))
+
+    def get_ranking_value(self, rating):
+        return get_ranking_value(self.field, rating.mu, rating.sigma)
+
+    def count_above(self, rating, excluded_player_ids=()):
+        """
+        Return the number of players ranked higher than a player with the
+        given ``rating``, not counting the players with the given ids.
+        """
+        value = self.get_ranking_value(rating)
+        count = (len(self.sorted_values) -
+                 bisect_right(self.sorted_values, value))
+
+        for player_id in excluded_player_ids:
+            if (player_id in self.ratings and
+                    self.get_ranking_value(self.ratings[player_id]) > value):
+                count -= 1
+
+        return count
+
+    def get_ranking(self, player_id):
+        if player_id not in self.ratings:
+            return None
+
+        return self.count_above(self.ratings[player_id]) + 1
+
+
+def get_competition_version(competition_id):
+    """
+    Return a tuple (last scored game id, scores token, ranking field) that
+    changes each time a game of the competition is scored or removed, each
+    time its scores are rewritten by a replay or a recalculation (see
+    ``invalidate_scores_version``) and when its ranking order changes.
+    Return None if the competition doesn't exist.
+    """
+    competition = (Competition.objects.only('id', 'ranking_order')
+                                      .filter(pk=competition_id)
+                                      .first())
+
+    if competition is None:
+        return None
+
+    last_game_id = (Game.objects.filter(competition_id=competition_id,
+                                        is_scored=True)
+                                .order_by('-id')
+                                .values_list('id', flat=True)
+                                .first())
+
+    return (last_game_id,
+            cache.get(get_scores_version_cache_key(competition_id)),
+            competition.ranking_field)
+
+
+def get_scores_snapshot(competition_id, version):
+    """
+    Return the ``ScoresSnapshot`` of the competition at the given
+    ``version`` (as returned by ``get_competition_version``). Snapshots are
+    kept in memory until the scores of the competition change.
+    """
+    with _snapshots_lock:
+        cached = _snapshots.get(competition_id)
+
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    snapshot = ScoresSnapshot(
+        {
+            player_id: Rating(mu, sigma)
+            for player_id, mu, sigma in (
+                Score.objects.filter(competition_id=competition_id)
+                             .values_list('player_id', 'score', 'stdev')
+            )
+        },
+        field=version[2]
+    )
+
+    with _snapshots_lock:
+        _snapshots[competition_id] = (version, snapshot)
+
+    return snapshot
+
+
+def get_win_probability(rating1, rating2):
+    """
+    Return the probability that a player with ``rating1`` beats a player with
+    ``rating2``.
+    """
+    env = global_env()
+    denominator = math.sqrt(2 * env.beta ** 2 + rating1.sigma ** 2 +
+                            rating2.sigma ** 2)
+
+    return env.cdf((rating1.mu - rating2.mu) / denominator)
+
+
+def get_outcome(snapshot, winner_id, loser_id):
+    """
+    Return the new score and rank of both players if ``winner_id`` beats
+    ``loser_id``.
+    """
+    winner_rating, loser_rating = rate_1vs1(snapshot.get_rating(winner_id),
+                                            snapshot.get_rating(loser_id))
+    players = (winner_id, loser_id)
+    outcome = {}
+
+    for player_id, rating, other_rating in (
+            (winner_id, winner_rating, loser_rating),
+            (loser_id, loser_rating, winner_rating)):
+        ranking = (snapshot.count_above(rating, players) + 1 +
+                   (1 if snapshot.get_ranking_value(other_rating) >
+                    snapshot.get_ranking_value(rating) else 0))
+        outcome[player_id] = {
+            'mu': rating.mu,
+            'sigma': rating.sigma,
+            'ranking': ranking,
+        }
+
+    return outcome
+
+
+def predict_game(snapshot, player1_id, player2_id):
+    """
+    Return the win probability of ``player1_id`` against ``player2_id``, the
+    quality of the match and the resulting scores and ranks for both
+    outcomes, based on the given ``ScoresSnapshot``. Raise ``ValueError`` if
+    both players are the same.
+    """
+    if player1_id == player2_id:
+        raise ValueError("A player can't play against themselves")
+
+    rating1 = snapshot.get_rating(player1_id)
+    rating2 = snapshot.get_rating(player2_id)
+
+    player1_wins = get_outcome(snapshot, player1_id, player2_id)
+    player2_wins = get_outcome(snapshot, player2_id, player1_id)
+
+    return {
+        'win_probability': get_win_probability(rating1, rating2),
+        'quality': quality_1vs1(rating1, rating2),
+        'current': {
+            'player1': {
+                'mu': rating1.mu,
+                'sigma': rating1.sigma,
+                'ranking': snapshot.get_ranking(player1_id),
+            },
+            'player2': {
+                'mu': rating2.mu,
+                'sigma': rating2.sigma,
+                'ranking': snapshot.get_ranking(player2_id),
+            },
+        },
+        'if_player1_wins': {
+            'player1': player1_wins[player1_id],
+            'player2': player1_wins[player2_id],
+        },
+        'if_player2_wins': {
+            'player1': player2_wins[player1_id],
+            'player2': player2_wins[player2_id],
+        },
+    }
@@ -0,0 +1,68 @@
+import time
+
+from django.db import transaction
+
+from trueskill import Rating
+
+from .models import (
+    CompetitionSnapshot, Game, HistoricalScore, HistoryArchive, PlayerSummary,
+    RatingCheckpoint, Score
+)
+from .models.checkpoint import replay_with_checkpoints
+from .models.score import get_conservative_score, save_ratings
+
+
+def recalculate_competition(competition_id, mu, sigma,
+                            rebuild_summaries=True):
+    """
+    Replay all the games of the competition in memory with the given initial
+    score and standard deviation, and replace its historical scores and
+    scores with the results. Return a tuple (competition_id, nb_games,
+    duration in seconds).
+
+    The summaries of the players span all the competitions, so
+    ``rebuild_summaries`` can be set to False when they're rebuilt once all
+    the competitions are recalculated.
+
+    This is a top-level function so that it can be run in a worker process.
+    """
+    start = time.time()
+    initial_rating = Rating(mu, sigma)
+
+    games = list(Game.objects.filter(competition_id=competition_id)
+                             .order_by('id')
+                             .values_list('id', 'winner_id', 'loser_id'))
+    ratings = {}
+    historical_scores, checkpoints = replay_with_checkpoints(
+        competition_id, games, ratings, initial_rating
+    )
+
+    with transaction.atomic():
+        HistoricalScore.objects.filter(
+            game__competition_id=competition_id
+        ).delete()
+        RatingCheckpoint.objects.filter(
+            competition_id=competition_id
+        ).delete()
+        # The replayed historical scores replace the archived ones
+        HistoryArchive.objects.filter(
+            competition_id=competition_id
+        ).delete()
+        Score.objects.filter(competition_id=competition_id).update(
+            score=mu, stdev=sigma,
+            conservative_score=get_conservative_score(mu, sigma)
+        )
+
+        HistoricalScore.objects.bulk_create(historical_scores,
+                                            batch_size=1000)
+        RatingCheckpoint.objects.bulk_create(checkpoints)
+        save_ratings(competition_id, ratings)
+        # Pending games have just been rated with the others
+        Game.objects.filter(competition_id=competition_id,
+                            is_scored=False).update(is_scored=True)
+        if rebuild_summaries:
+            PlayerSummary.objects.rebuild(ratings)
+        # The bulk writes above don't send the signals that thaw snapshots
+        CompetitionSnapshot.objects.thaw(competition_id)
+
+    return competition_id, len(games), time.time() - start
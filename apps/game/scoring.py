@@ -0,0 +1,103 @@
+"""
+Write-behind scoring of the competitions with ``deferred_scoring`` enabled:
+announcing a game there only inserts it, and the games are rated later on in
+the order of their ids, in batches, by ``score_pending_games`` (run by the
+``score_games`` command), which sends their ``game_played`` signal.
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import signals
+from .models import (
+    Competition, Game, PlayerSummary, RatingCheckpoint, Score
+)
+from .models.game import send_ranking_changes
+from .models.score import update_players_scores
+
+
+def get_pending_competition_ids():
+    """
+    Return the ids of the competitions that have games waiting to be rated.
+    This only reads the partial index of the pending games.
+    """
+    return list(Game.objects.filter(is_scored=False)
+                            .order_by('competition_id')
+                            .values_list('competition_id', flat=True)
+                            .distinct())
+
+
+def score_pending_games(competition_id, batch_size=None):
+    """
+    Rate at most ``batch_size`` of the pending games of the competition, in
+    the order of their ids, and return the number of rated games. The
+    competition row is locked while the batch is rated so that concurrent
+    scorers of the same competition run one after the other.
+    """
+    if batch_size is None:
+        batch_size = settings.SCORING_BATCH_SIZE
+
+    with transaction.atomic():
+        competition = (Competition.objects.select_for_update()
+                                          .get(pk=competition_id))
+        games = list(competition.games
+                                .filter(is_scored=False)
+                                .select_related('winner__profile',
+                                                'loser__profile')
+                                .order_by('id')[:batch_size])
+
+        if not games:
+            return 0
+
+        # Last game of every player of the batch
+        last_games = OrderedDict()
+        for game in games:
+            last_games[game.winner] = game
+            last_games[game.loser] = game
+
+        scores = competition.get_scores_for_update(last_games)
+        old_rankings = {player_id: score.ranking
+                        for player_id, score in scores.items()
+                        if score.ranking is not None}
+
+        for game in games:
+            game.competition = competition
+            deltas = update_players_scores(game.winner, game.loser, game,
+                                           scores)
+            PlayerSummary.objects.record_game(game, deltas)
+
+        Game.objects.filter(id__in=[game.id for game in games]).update(
+            is_scored=True
+        )
+        # The scores are the ones right after the last game of the batch, and
+        # the checkpoint only counts the games once they're flagged
+        RatingCheckpoint.objects.create_if_due(games[-1])
+
+        for game in games:
+            game.is_scored = True
+            signals.game_played.send(sender=game)
+
+        new_rankings = Score.objects.get_rankings(
+            competition.id, scores, competition.ranking_field
+        )
+        send_ranking_changes(competition, old_rankings, new_rankings,
+                             list(last_games.items()))
+
+    return len(games)
+
+
+def score_all_pending_games(competition_id, batch_size=None):
+    """
+    Rate the pending games of the competition batch by batch until there's
+    none left, and return the number of rated games.
+    """
+    nb_games = 0
+
+    while True:
+        nb_batch_games = score_pending_games(competition_id, batch_size)
+
+        if not nb_batch_games:
+            return nb_games
+
+        nb_games += nb_batch_games
@@ -2,9 +2,13 @@ from django.dispatch import Signal
 
 
 competition_created = Signal()
-user_joined_competition = Signal(providing_args=['user'])
-user_left_competition = Signal(providing_args=['user'])
+# Sent once with all the users who joined or left the competition at once
+users_joined_competition = Signal(providing_args=['users'])
+users_left_competition = Signal(providing_args=['users'])
 game_played = Signal()
 ranking_changed = Signal(providing_args=[
     'player', 'old_ranking', 'new_ranking', 'competition'
 ])
+# Sent once with all the ranking changes caused by a game, or a batch of
+# games, so that receivers can handle them at once
+rankings_changed = Signal(providing_args=['changes'])
@@ -0,0 +1,199 @@
+from collections import OrderedDict
+import json
+
+from django.utils.dateparse import parse_datetime
+
+from . import stats
+from .models import CompetitionSnapshot
+
+
+# The Frozen* classes expose the snapshot data with the same attributes as the
+# models used by the templates
+
+
+class FrozenProfile:
+    def __init__(self, data):
+        self.avatar = data['avatar']
+        self.full_name = data['profile_full_name']
+        self.short_name = data['short_name']
+
+    def get_full_name(self):
+        return self.full_name
+
+    def get_short_name(self):
+        return self.short_name
+
+
+class FrozenUser:
+    def __init__(self, data):
+        self.id = self.pk = data['id']
+        self.full_name = data['full_name']
+        self.profile = FrozenProfile(data)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def get_full_name(self):
+        return self.full_name
+
+
+class FrozenGame:
+    def __init__(self, data):
+        self.id = self.pk = data['id']
+        self.date = parse_datetime(data['date'])
+        self.winner = FrozenUser(data['winner'])
+        self.loser = FrozenUser(data['loser'])
+        self.winner_id = self.winner.id
+        self.loser_id = self.loser.id
+
+
+class FrozenScore:
+    def __init__(self, data):
+        self.player = FrozenUser(data['player'])
+        self.player_id = self.player.id
+        # Snapshots frozen before the rankings were stored don't have them
+        self.ranking = data.get('ranking')
+        self.score = data['score']
+        self.stdev = data['stdev']
+
+
+def serialize_user(user):
+    return {
+        'id': user.id,
+        'full_name': user.get_full_name(),
+        'profile_full_name': user.profile.get_full_name(),
+        'short_name': user.profile.get_short_name(),
+        'avatar': user.profile.avatar,
+    }
+
+
+def serialize_game(game):
+    return {
+        'id': game.id,
+        'date': game.date.isoformat(),
+        'winner': serialize_user(game.winner),
+        'loser': serialize_user(game.loser),
+    }
+
+
+def serialize_player_stats(player, competition):
+    score = competition.get_score(player)
+    wins = competition.get_wins(player)
+    defeats = competition.get_defeats(player)
+    last_results = stats.get_last_games_stats(player, competition, 10)
+
+    return {
+        'player': serialize_user(player),
+        'score': {'score': score.score, 'stdev': score.stdev},
+        'wins': wins,
+        'defeats': defeats,
+        'longest_streak': stats.get_longest_streak(player, competition),
+        'current_streak': stats.get_current_streak(player, competition),
+        'last_results': {
+            'wins': last_results['wins'],
+            'defeats': last_results['defeats'],
+            'games': [serialize_game(game) for game in last_results['games']],
+        },
+        'head2head': [
+            {
+                'opponent': serialize_user(opponent),
+                'wins': results['wins'],
+                'defeats': results['defeats'],
+                'fairness': results['fairness'],
+            }
+            for opponent, results in stats.get_head2head(
+                player, competition
+            ).items()
+        ],
+    }
+
+
+def freeze(competition):
+    """
+    Compute the pages data of the finished competition (which will never
+    change) and store it in a new ``CompetitionSnapshot``, replacing the
+    existing one.
+    """
+    players = (competition.get_players()
+                          .select_related('profile')
+                          .filter(scores__competition=competition))
+
+    data = {
+        'score_board': [
+            {
+                'player': serialize_user(score.player),
+                'ranking': score.ranking,
+                'score': score.score,
+                'stdev': score.stdev,
+            }
+            for score in competition.get_score_board()
+        ],
+        'latest_games': [serialize_game(game)
+                         for game in competition.get_latest_games()],
+        'score_chart': json.loads(stats.get_latest_results_by_player(
+            competition, 50, 0, True
+        )),
+        'players': {
+            str(player.id): serialize_player_stats(player, competition)
+            for player in players
+        },
+    }
+
+    CompetitionSnapshot.objects.filter(competition=competition).delete()
+
+    return CompetitionSnapshot.objects.create(competition=competition,
+                                              data=data)
+
+
+def get_detail_context(snapshot):
+    """
+    Return the ``score_board`` and ``latest_results`` of the competition
+    detail page from the given snapshot.
+    """
+    return {
+        'score_board': [FrozenScore(score)
+                        for score in snapshot.data['score_board']],
+        'latest_results': [FrozenGame(game)
+                           for game in snapshot.data['latest_games']],
+    }
+
+
+def get_score_chart(snapshot):
+    return json.dumps(snapshot.data['score_chart'])
+
+
+def get_player_context(snapshot, player_id):
+    """
+    Return the context of the player detail page (without the weekly stats,
+    which don't depend on the competition) from the given snapshot, or None
+    if the player didn't play in the competition.
+    """
+    player_stats = snapshot.data['players'].get(str(player_id))
+
+    if player_stats is None:
+        return None
+
+    wins, defeats = player_stats['wins'], player_stats['defeats']
+
+    return {
+        'player': FrozenUser(player_stats['player']),
+        'head2head': OrderedDict(
+            (FrozenUser(results['opponent']), results)
+            for results in player_stats['head2head']
+        ),
+        'last_results': {
+            'wins': player_stats['last_results']['wins'],
+            'defeats': player_stats['last_results']['defeats'],
+            'games': [FrozenGame(game)
+                      for game in player_stats['last_results']['games']],
+        },
+        'longest_streak': player_stats['longest_streak'],
+        'current_streak': player_stats['current_streak'],
+        'games': wins + defeats,
+        'wins': wins,
+        'defeats': defeats,
+        'score': player_stats['score'],
+    }
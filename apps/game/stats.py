@@ -182,9 +182,12 @@ def get_latest_results_by_player(competition, nb_games, offset=0,
     """
     # add start to nb_games because slicing want the end position
     nb_games += offset
-    games = (competition.games
-             .order_by('-id')
-             .prefetch_related('historical_scores')[offset:nb_games])
+    # Pending games have no historical scores yet
+    games = list(competition.games.filter(is_scored=True)
+                                  .order_by('-id')[offset:nb_games])
+    historical_scores_by_game = competition.get_historical_scores_by_game(
+        [game.id for game in games]
+    )
 
     players = competition.get_players()
     scores_by_player = {}
@@ -199,8 +202,8 @@ def get_latest_results_by_player(competition, nb_games, offset=0,
             if player.id in [game.winner_id, game.loser_id]:
                 player_historical_score = None
                 # We don't use get() here so we don't hit the database
-                # since historical scores are prefetched
-                for historical_score in game.historical_scores.all():
+                # since historical scores are fetched beforehand
+                for historical_score in historical_scores_by_game[game.id]:
                     if historical_score.player_id == player.id:
                         player_historical_score = historical_score
                         break
@@ -246,3 +249,43 @@ def get_latest_results_by_player(competition, nb_games, offset=0,
         return json.dumps(json_result)
 
     return scores_by_player
+
+
+def get_latest_results_columnar(competition, nb_games, offset=0,
+                                precision=None):
+    """
+    Same as ``get_latest_results_by_player`` but return a JSON string with
+    the results as parallel arrays instead of a list of objects per player,
+    so that key names aren't repeated for each game:
+
+    {games: [game_id, ...],
+     players: {player_a: {skills: [...], positions: [...], flags: [...]}}}
+
+    Flags are 0 if the player didn't play the game, 1 if they lost and 3 if
+    they won. If ``precision`` is given, skills are rounded to that number of
+    decimals.
+    """
+    scores_by_player = get_latest_results_by_player(competition, nb_games,
+                                                    offset)
+    games = []
+    players = {}
+
+    for player, results in scores_by_player.items():
+        if not games:
+            games = [result['game'] for result in results]
+
+        skills = [result['skill'] for result in results]
+        if precision is not None:
+            skills = [round(skill, precision) for skill in skills]
+
+        players[player.profile.get_short_name()] = {
+            'skills': skills,
+            'positions': [result['position'] for result in results],
+            'flags': [
+                (1 if result['played'] else 0) | (2 if result.get('win') else 0)
+                for result in results
+            ],
+        }
+
+    return json.dumps({'games': games, 'players': players},
+                      separators=(',', ':'))
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from ..user.models import get_display_name
+from .models import Competition, PlayerSummary
+from .models.summary import get_player_summary_cache_key
+
+
+def get_player_overview(player):
+    """
+    Return the overview of the player across all their competitions (see
+    ``build_player_overview``), from the cache if possible. Cached overviews
+    are invalidated when the summary of the player changes, and expire after
+    ``PLAYER_SUMMARY_CACHE_TIMEOUT`` seconds since the ranks also move with
+    the games of the other players.
+    """
+    cache_key = get_player_summary_cache_key(player.id)
+    overview = cache.get(cache_key)
+
+    if overview is None:
+        overview = build_player_overview(player)
+        cache.set(cache_key, overview, settings.PLAYER_SUMMARY_CACHE_TIMEOUT)
+
+    return overview
+
+
+def build_player_overview(player):
+    """
+    Return a dict with the wins and losses of the player in all the
+    competitions, their score change over their latest games (``trend``),
+    their best rank, the opponent they played the most against and the list
+    of their competitions (see ``CompetitionManager.get_played_by``).
+    """
+    summary, _ = PlayerSummary.objects.get_or_rebuild(player.id)
+    competitions = [{
+        'id': competition.id,
+        'name': competition.name,
+        'slug': competition.slug,
+        'ranking': competition.ranking,
+        'mu': competition.mu,
+        'sigma': competition.sigma,
+        'nb_games': competition.nb_games,
+        'last_game_date': competition.last_game_date,
+    } for competition in Competition.objects.get_played_by(player)]
+
+    # Competitions are sorted from the latest one, which wins ties
+    best_ranking = min(competitions, key=lambda c: c['ranking'],
+                       default=None)
+
+    favourite_opponent = summary.get_favourite_opponent()
+    if favourite_opponent is not None:
+        opponent_id, wins, losses = favourite_opponent
+        names = (get_user_model().objects.filter(pk=opponent_id)
+                 .values_list('first_name', 'last_name', 'username')
+                 .first())
+        favourite_opponent = {
+            'id': opponent_id,
+            'name': get_display_name(*names) if names else None,
+            'wins': wins,
+            'losses': losses,
+        }
+
+    return {
+        'player_id': player.id,
+        'wins': summary.wins,
+        'losses': summary.losses,
+        'nb_games': summary.wins + summary.losses,
+        'trend': sum(summary.trend),
+        'best_ranking': best_ranking,
+        'favourite_opponent': favourite_opponent,
+        'competitions': competitions,
+    }
@@ -2,6 +2,7 @@ from django import template
 from django.template.defaultfilters import floatformat
 
 from ..models import Competition
+from ..models.score import get_ranking_value
 
 
 register = template.Library()
@@ -23,3 +24,17 @@ def as_percentage_of(part, whole):
         return floatformat(float(part) / whole * 100, 2) + '%'
     except (ValueError, ZeroDivisionError):
         return ""
+
+
+@register.filter
+def ranking_value(score, competition):
+    """
+    Return the value the competition ranks the given score (a ``Score`` or a
+    leaderboard entry) by.
+    """
+    if isinstance(score, dict):
+        mu, sigma = score['mu'], score['sigma']
+    else:
+        mu, sigma = score.score, score.stdev
+
+    return get_ranking_value(competition.ranking_field, mu, sigma)
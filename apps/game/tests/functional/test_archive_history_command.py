@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from six import StringIO
+
+from rankme.tests import RankMeTestCase
+from ... import stats
+from ...models import HistoricalScore, HistoryArchive
+from ..factories import CompetitionFactory, UserFactory
+
+
+class ArchiveHistoryCommandTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.users = [UserFactory() for _ in range(3)]
+        self.competition = CompetitionFactory(
+            start_date=timezone.now() - timedelta(days=10)
+        )
+        self.games = [
+            self.competition.add_game(self.users[0], self.users[1]),
+            self.competition.add_game(self.users[1], self.users[2]),
+            self.competition.add_game(self.users[2], self.users[0]),
+        ]
+        self.competition.end_date = timezone.now() - timedelta(days=1)
+        self.competition.save()
+
+        self.ongoing_competition = CompetitionFactory()
+        self.ongoing_competition.add_game(self.users[0], self.users[1])
+
+    def archive(self):
+        call_command('archive_history', stdout=StringIO())
+
+    def test_archive_moves_past_competitions_history(self):
+        self.archive()
+
+        self.assertEqual(HistoryArchive.objects.get().competition,
+                         self.competition)
+        self.assertEqual(
+            HistoricalScore.objects.filter(
+                game__competition=self.competition
+            ).count(),
+            0
+        )
+        self.assertEqual(HistoricalScore.objects.count(), 2)
+
+    def test_score_board_at_works_on_archived_competition(self):
+        score_board = self.competition.get_score_board_at(self.games[1].id)
+        self.archive()
+
+        competition = type(self.competition).objects.get(
+            pk=self.competition.pk
+        )
+        self.assertEqual(competition.get_score_board_at(self.games[1].id),
+                         score_board)
+
+    def test_score_chart_works_on_archived_competition(self):
+        results = stats.get_latest_results_by_player(self.competition, 10)
+        self.archive()
+
+        competition = type(self.competition).objects.get(
+            pk=self.competition.pk
+        )
+        self.assertEqual(stats.get_latest_results_by_player(competition, 10),
+                         results)
+
+    def test_restore_archive(self):
+        self.archive()
+        HistoryArchive.objects.get().restore()
+
+        self.assertEqual(HistoricalScore.objects.count(), 8)
+        self.assertEqual(HistoryArchive.objects.count(), 0)
+
+    def test_reopened_competition_history_is_restored(self):
+        self.archive()
+        self.competition.end_date = None
+        self.competition.save()
+
+        self.assertEqual(HistoryArchive.objects.count(), 0)
+
+        self.competition.add_game(self.users[0], self.users[2])
+        results = stats.get_latest_results_by_player(self.competition, 10)
+        self.assertEqual(len(results[self.users[0]]), 4)
+
+    def test_delete_game_of_archived_competition(self):
+        self.archive()
+        self.games[0].delete()
+
+        self.assertEqual(HistoryArchive.objects.count(), 0)
+        self.assertEqual(
+            HistoricalScore.objects.filter(
+                game__competition=self.competition
+            ).count(),
+            4
+        )
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from trueskill import Rating
+
+from rankme.tests import RankMeTransactionTestCase
+from ...models import Game, Score
+from ...models.score import replay_games
+from ..factories import CompetitionFactory, UserFactory
+
+
+class ConcurrentAnnounceTestCase(RankMeTransactionTestCase):
+    # Every game is played by the champion so that all the threads contend on
+    # the lock of their score
+    NB_THREADS = 16
+    NB_GAMES_PER_THREAD = 20
+    # Minimum number of games announced per second while the threads wait for
+    # each other's lock
+    MIN_ANNOUNCES_PER_SECOND = 20
+
+    def setUp(self):
+        super().setUp()
+
+        self.competition = CompetitionFactory()
+        self.champion = UserFactory()
+        self.challengers = [UserFactory() for _ in range(self.NB_THREADS)]
+        self.start_barrier = threading.Barrier(self.NB_THREADS + 1)
+        self.errors = []
+
+    def announce_games(self, challenger, nb_games):
+        try:
+            self.start_barrier.wait()
+
+            for i in range(nb_games):
+                if i % 2:
+                    self.competition.add_game(self.champion, challenger)
+                else:
+                    self.competition.add_game(challenger, self.champion)
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_games_are_rated_in_id_order(self):
+        threads = [
+            threading.Thread(target=self.announce_games,
+                             args=(challenger, self.NB_GAMES_PER_THREAD))
+            for challenger in self.challengers
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Start the clock once all the threads are ready to announce
+        self.start_barrier.wait()
+        start = time.time()
+        for thread in threads:
+            thread.join()
+        duration = time.time() - start
+
+        self.assertEqual(self.errors, [])
+
+        nb_games = self.NB_THREADS * self.NB_GAMES_PER_THREAD
+        announces_per_second = nb_games / duration
+        self.assertGreaterEqual(
+            announces_per_second, self.MIN_ANNOUNCES_PER_SECOND,
+            "%d games were announced in %.2fs (%.1f games/s)" % (
+                nb_games, duration, announces_per_second
+            )
+        )
+
+        games = Game.objects.filter(
+            competition=self.competition
+        ).order_by('id').values_list('id', 'winner_id', 'loser_id')
+        self.assertEqual(len(games), nb_games)
+
+        ratings = {}
+        replay_games(games, ratings, Rating(settings.GAME_INITIAL_MU,
+                                            settings.GAME_INITIAL_SIGMA))
+
+        scores = Score.objects.filter(competition=self.competition)
+        self.assertEqual(len(scores), self.NB_THREADS + 1)
+        for score in scores:
+            self.assertAlmostEqual(score.score, ratings[score.player_id].mu)
+            self.assertAlmostEqual(score.stdev,
+                                   ratings[score.player_id].sigma)
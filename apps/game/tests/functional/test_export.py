@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+
+from six import StringIO
+
+from rankme.tests import RankMeTestCase
+from ...models import HistoryArchive
+from ..factories import CompetitionFactory, UserFactory
+
+
+class ExportTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = UserFactory()
+        self.competition = CompetitionFactory(creator=self.user)
+        self.players = [UserFactory() for _ in range(2)]
+        self.games = [
+            self.competition.add_game(self.players[0], self.players[1]),
+            self.competition.add_game(self.players[1], self.players[0]),
+        ]
+
+        self.client.login(username=self.user.username, password='password')
+
+    def get_export(self, export_format):
+        response = self.client.get(reverse('competition_export', kwargs={
+            'competition_slug': self.competition.slug,
+            'export_format': export_format,
+        }))
+        self.assertEqual(response.status_code, 200)
+
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_contains_games_and_scores(self):
+        rows = list(csv.DictReader(io.StringIO(self.get_export('csv'))))
+
+        self.assertEqual([int(row['game_id']) for row in rows],
+                         [game.id for game in self.games])
+
+        historical_score = self.games[0].historical_scores.get(
+            player=self.players[0]
+        )
+        self.assertAlmostEqual(float(rows[0]['winner_score']),
+                               historical_score.score)
+
+    def test_export_reads_archived_scores(self):
+        historical_score = self.games[1].historical_scores.get(
+            player=self.players[0]
+        )
+        HistoryArchive.objects.archive(self.competition)
+
+        rows = list(csv.DictReader(io.StringIO(self.get_export('csv'))))
+
+        self.assertEqual(len(rows), 2)
+        self.assertAlmostEqual(float(rows[1]['loser_score']),
+                               historical_score.score)
+        self.assertAlmostEqual(float(rows[1]['loser_stdev']),
+                               historical_score.stdev)
+
+    def test_ndjson_export_contains_one_game_per_line(self):
+        lines = self.get_export('ndjson').splitlines()
+        rows = [json.loads(line) for line in lines]
+
+        self.assertEqual([row['game_id'] for row in rows],
+                         [game.id for game in self.games])
+        self.assertEqual(rows[1]['winner_id'], self.players[1].id)
+
+    def test_export_command(self):
+        stdout = StringIO()
+        call_command('export_games', self.competition.slug,
+                     export_format='ndjson', stdout=stdout)
+
+        self.assertEqual(len(stdout.getvalue().splitlines()), 2)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+
+from six import StringIO
+
+from rankme.tests import RankMeTestCase
+from ...models import CompetitionSnapshot, HistoryArchive
+from ...replay import recalculate_competition
+from ..factories import CompetitionFactory, UserFactory
+
+
+class FreezeCompetitionsCommandTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.user = UserFactory()
+        self.players = [UserFactory() for _ in range(2)]
+        self.competition = CompetitionFactory(
+            creator=self.user, start_date=timezone.now() - timedelta(days=10)
+        )
+        self.competition.add_game(self.players[0], self.players[1])
+        self.competition.add_game(self.players[0], self.players[1])
+        self.competition.end_date = timezone.now() - timedelta(days=1)
+        self.competition.save()
+
+        self.client.login(username=self.user.username, password='password')
+
+    def freeze(self):
+        call_command('freeze_competitions', stdout=StringIO())
+
+    def get_detail_url(self):
+        return reverse('competition_detail', kwargs={
+            'competition_slug': self.competition.slug
+        })
+
+    def test_past_competitions_are_frozen(self):
+        CompetitionFactory()
+        self.freeze()
+
+        snapshot = CompetitionSnapshot.objects.get()
+        self.assertEqual(snapshot.competition, self.competition)
+        self.assertEqual(len(snapshot.data['score_board']), 2)
+
+    def test_frozen_pages_match_live_pages(self):
+        live_response = self.client.get(self.get_detail_url())
+        live_chart = self.client.get(reverse(
+            'competition_detail_score_chart', args=[self.competition.slug]
+        ))
+        self.freeze()
+
+        response = self.client.get(self.get_detail_url())
+        self.assertEqual(
+            [score.player_id for score in response.context['score_board']],
+            [score.player_id for score in live_response.context['score_board']]
+        )
+        self.assertContains(response,
+                            self.players[0].profile.get_short_name())
+
+        chart = self.client.get(reverse('competition_detail_score_chart',
+                                        args=[self.competition.slug]))
+        self.assertJSONEqual(chart.content.decode(),
+                             live_chart.content.decode())
+
+    def test_frozen_player_page(self):
+        self.freeze()
+
+        response = self.client.get(reverse('player_detail', kwargs={
+            'competition_slug': self.competition.slug,
+            'player_id': self.players[0].id,
+        }))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['wins'], 2)
+        self.assertEqual(response.context['current_streak'], 2)
+
+    def test_changing_competition_thaws_it(self):
+        self.freeze()
+        self.competition.description = 'Changed'
+        self.competition.save()
+
+        self.assertEqual(CompetitionSnapshot.objects.count(), 0)
+
+    def test_recalculating_competition_thaws_it(self):
+        self.freeze()
+        recalculate_competition(self.competition.id, 25, 8)
+
+        self.assertEqual(CompetitionSnapshot.objects.count(), 0)
+
+    def test_archiving_competition_thaws_it(self):
+        self.freeze()
+        archive = HistoryArchive.objects.archive(self.competition)
+        self.assertEqual(CompetitionSnapshot.objects.count(), 0)
+
+        self.freeze()
+        archive.restore()
+        self.assertEqual(CompetitionSnapshot.objects.count(), 0)
@@ -4,8 +4,9 @@ from django.core.management import call_command
 
 from trueskill import Rating, rate_1vs1
 
-from rankme.tests import RankMeTestCase
-from ...models import Game
+from rankme.tests import RankMeTestCase, RankMeTransactionTestCase
+from ...models import Game, HistoricalScore, Score
+from ...models.score import save_ratings
 from ..factories import UserFactory, CompetitionFactory
 
 
@@ -39,3 +40,83 @@ class RecalculateCommandTestCase(RankMeTestCase):
         self.assertAlmostEqual(winner_score.stdev, expected_winner_score.sigma)
         self.assertAlmostEqual(loser_score.score, expected_loser_score.mu)
         self.assertAlmostEqual(loser_score.stdev, expected_loser_score.sigma)
+
+    def test_recalculate_keeps_competitions_separate(self):
+        users = [UserFactory(), UserFactory()]
+        competitions = [CompetitionFactory(), CompetitionFactory()]
+
+        Game.objects.announce(users[0], users[1], competitions[0])
+        Game.objects.announce(users[1], users[0], competitions[1])
+        Game.objects.announce(users[1], users[0], competitions[1])
+
+        expected_scores = {
+            competition.id: {
+                score.player_id: (score.score, score.stdev)
+                for score in competition.scores.all()
+            }
+            for competition in competitions
+        }
+
+        stdout = StringIO()
+        call_command('recalculate', stdout=stdout)
+
+        for competition in competitions:
+            for score in competition.scores.all():
+                expected_score, expected_stdev = (
+                    expected_scores[competition.id][score.player_id]
+                )
+                self.assertAlmostEqual(score.score, expected_score)
+                self.assertAlmostEqual(score.stdev, expected_stdev)
+
+        self.assertEqual(HistoricalScore.objects.count(), 6)
+        self.assertIn("Competition %s: 2 games" % competitions[1].id,
+                      stdout.getvalue())
+
+    def test_save_ratings_runs_constant_number_of_queries(self):
+        users = [UserFactory() for _ in range(4)]
+        competition = CompetitionFactory()
+        competition.add_game(users[0], users[1])
+        ratings = {user.id: Rating(30 + index, 5)
+                   for index, user in enumerate(users)}
+
+        # One update of the existing scores and one insert of the new ones
+        with self.assertNumQueries(2):
+            save_ratings(competition.id, ratings)
+
+        self.assertEqual(
+            dict(competition.scores.values_list('player_id', 'score')),
+            {user.id: 30 + index for index, user in enumerate(users)}
+        )
+        self.assertEqual(
+            competition.scores.get(player=users[0]).conservative_score,
+            30 - 3 * 5
+        )
+
+
+class RecalculateJobsTestCase(RankMeTransactionTestCase):
+    # The workers have their own connections, so the data has to be committed
+    def test_recalculate_with_jobs(self):
+        users = [UserFactory() for _ in range(3)]
+        competitions = [CompetitionFactory(), CompetitionFactory()]
+
+        for competition in competitions:
+            Game.objects.announce(users[0], users[1], competition)
+            Game.objects.announce(users[2], users[0], competition)
+
+        expected_scores = dict(
+            (score.id, (score.score, score.stdev))
+            for score in Score.objects.all()
+        )
+        Score.objects.update(score=0, stdev=1)
+
+        stdout = StringIO()
+        call_command('recalculate', jobs=2, stdout=stdout)
+
+        for score in Score.objects.all():
+            expected_score, expected_stdev = expected_scores[score.id]
+            self.assertAlmostEqual(score.score, expected_score)
+            self.assertAlmostEqual(score.stdev, expected_stdev)
+
+        for competition in competitions:
+            self.assertIn("Competition %s: 2 games" % competition.id,
+                          stdout.getvalue())
@@ -3,7 +3,8 @@ from django.core.urlresolvers import reverse
 
 from rankme.tests import RankMeTestCase
 
-from ...models import Game
+from ...models import Competition, Game
+from ...templatetags.game_extras import ranking_value
 from ..factories import UserFactory, CompetitionFactory
 
 User = get_user_model()
@@ -75,6 +76,26 @@ class TestResultsPage(RankMeTestCase):
         self.assertNotContains(response, 'No scores registered yet')
         self.assertContains(response, '<div class="score-board')
         self.assertContains(response, '<tr class="score-item"', 2)
+        self.assertContains(response, '<tr class="around-me-item"', 2)
         self.assertContains(response, '<div class="latest-results')
         self.assertContains(response, '<table class="games')
         self.assertContains(response, '<tr class="game-item', 1)
+
+    def test_conservative_competition_shows_conservative_scores(self):
+        players = [UserFactory() for _ in range(2)]
+        competition = CompetitionFactory(
+            ranking_order=Competition.RANKING_CONSERVATIVE
+        )
+        competition.add_game(players[0], players[1])
+        score = competition.get_score(players[0])
+
+        self.client.login(username=competition.creator.username,
+                          password='password')
+        response = self.client.get(reverse('competition_detail', kwargs={
+            'competition_slug': competition.slug
+        }))
+
+        self.assertEqual(ranking_value(score, competition),
+                         score.conservative_score)
+        self.assertContains(response, '%.2f' % score.conservative_score)
+        self.assertNotContains(response, '%.2f' % score.score)
@@ -0,0 +1,75 @@
+from six import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.dispatch import receiver
+
+import mock
+from trueskill import Rating, rate_1vs1
+
+from rankme.tests import RankMeTestCase
+from ...models import Game, HistoricalScore, Score
+from ...signals import game_played
+from ..factories import UserFactory, CompetitionFactory
+
+
+class ScoreGamesCommandTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.users = [UserFactory(), UserFactory()]
+        self.competition = CompetitionFactory(deferred_scoring=True)
+
+    def test_deferred_announce_only_inserts_the_game(self):
+        game = self.competition.add_game(self.users[0], self.users[1])
+
+        self.assertFalse(game.is_scored)
+        self.assertFalse(Score.objects.filter(
+            competition=self.competition).exists())
+        self.assertFalse(HistoricalScore.objects.filter(game=game).exists())
+
+    def test_pending_games_are_rated_in_order(self):
+        self.competition.add_game(self.users[0], self.users[1])
+        self.competition.add_game(self.users[1], self.users[0])
+
+        call_command('score_games', '--batch-size', '1', stdout=StringIO())
+
+        initial_rating = Rating(settings.GAME_INITIAL_MU,
+                                settings.GAME_INITIAL_SIGMA)
+        winner_rating, loser_rating = rate_1vs1(initial_rating,
+                                                initial_rating)
+        loser_rating, winner_rating = rate_1vs1(loser_rating, winner_rating)
+
+        self.assertFalse(Game.objects.filter(is_scored=False).exists())
+        self.assertEqual(HistoricalScore.objects.count(), 4)
+        self.assertAlmostEqual(
+            self.competition.get_score(self.users[0]).score, winner_rating.mu
+        )
+        self.assertAlmostEqual(
+            self.competition.get_score(self.users[1]).score, loser_rating.mu
+        )
+
+    def test_game_played_is_sent_once_the_game_is_rated(self):
+        game_played_receiver = receiver(game_played)(mock.Mock())
+
+        game = self.competition.add_game(self.users[0], self.users[1])
+        self.assertEqual(game_played_receiver.call_count, 0)
+
+        call_command('score_games', stdout=StringIO())
+
+        game_played_receiver.assert_called_once_with(sender=game,
+                                                     signal=mock.ANY)
+        self.assertTrue(game_played_receiver.call_args[1]['sender'].is_scored)
+
+    def test_deleting_a_pending_game_leaves_scores_untouched(self):
+        self.competition.deferred_scoring = False
+        self.competition.save()
+        self.competition.add_game(self.users[0], self.users[1])
+        self.competition.deferred_scoring = True
+        self.competition.save()
+        score = self.competition.get_score(self.users[0]).score
+
+        self.competition.add_game(self.users[1], self.users[0]).delete()
+
+        self.assertEqual(self.competition.get_score(self.users[0]).score,
+                         score)
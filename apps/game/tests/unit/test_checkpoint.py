@@ -0,0 +1,91 @@
+from django.test.utils import override_settings
+
+from trueskill import Rating
+
+from rankme.tests import RankMeTestCase
+
+from ...models import HistoricalScore, RatingCheckpoint
+from ...models.checkpoint import pack_ratings, unpack_ratings
+from ...scoring import score_pending_games
+from ..factories import CompetitionFactory, UserFactory
+
+
+@override_settings(RATING_CHECKPOINT_INTERVAL=2)
+class RatingCheckpointTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.users = [UserFactory() for _ in range(3)]
+        self.competition = CompetitionFactory()
+
+    def add_games(self, nb_games):
+        return [
+            self.competition.add_game(self.users[i % 3],
+                                      self.users[(i + 1) % 3])
+            for i in range(nb_games)
+        ]
+
+    def test_pack_ratings(self):
+        ratings = {1: Rating(25, 8), 42: Rating(30.5, 2.25)}
+        self.assertEqual(unpack_ratings(pack_ratings(ratings)), ratings)
+
+    def test_checkpoints_are_created_periodically(self):
+        games = self.add_games(5)
+        checkpoints = RatingCheckpoint.objects.order_by('game_id')
+
+        self.assertEqual([checkpoint.game_id for checkpoint in checkpoints],
+                         [games[1].id, games[3].id])
+        self.assertEqual([checkpoint.nb_games for checkpoint in checkpoints],
+                         [2, 4])
+
+        ratings = checkpoints[1].get_ratings()
+        historical_score = games[3].historical_scores.get(
+            player_id=games[3].winner_id
+        )
+        self.assertAlmostEqual(ratings[games[3].winner_id].mu,
+                               historical_score.score)
+
+    def test_pending_games_dont_count(self):
+        self.add_games(1)
+        self.competition.deferred_scoring = True
+        self.competition.save()
+        self.add_games(1)
+        self.competition.deferred_scoring = False
+        self.competition.save()
+        game = self.add_games(1)[0]
+
+        checkpoint = RatingCheckpoint.objects.get()
+        self.assertEqual((checkpoint.game_id, checkpoint.nb_games),
+                         (game.id, 2))
+
+    def test_scorer_creates_checkpoints(self):
+        self.competition.deferred_scoring = True
+        self.competition.save()
+        games = self.add_games(3)
+
+        score_pending_games(self.competition.id)
+
+        checkpoint = RatingCheckpoint.objects.get()
+        self.assertEqual((checkpoint.game_id, checkpoint.nb_games),
+                         (games[2].id, 3))
+
+    def test_get_ratings_at(self):
+        games = self.add_games(5)
+        ratings = self.competition.get_ratings_at(games[2].id)
+
+        for historical_score in games[2].historical_scores.all():
+            self.assertAlmostEqual(ratings[historical_score.player_id].mu,
+                                   historical_score.score)
+
+    def test_deleting_older_game_replays_following_games(self):
+        games = self.add_games(5)
+        games[1].delete()
+
+        self.assertEqual(HistoricalScore.objects.count(), 8)
+        self.assertEqual(RatingCheckpoint.objects.count(), 2)
+
+        last_game = games[4]
+        for historical_score in last_game.historical_scores.all():
+            score = self.competition.get_score(historical_score.player)
+            self.assertAlmostEqual(score.score, historical_score.score)
+            self.assertAlmostEqual(score.stdev, historical_score.stdev)
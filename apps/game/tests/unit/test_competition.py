@@ -2,12 +2,16 @@ from datetime import timedelta
 
 import mock
 
+from django.db import connection
 from django.dispatch import receiver
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
+from apps.timeline.models import Event
 from rankme.tests import RankMeTestCase
 
-from ...models import Competition, Game
+from ...exceptions import CannotLeaveCompetitionError
+from ...models import Competition, Game, HistoricalScore, Score
 from ...signals import competition_created
 from ..factories import CompetitionFactory, UserFactory
 
@@ -93,3 +97,255 @@ class CompetitionTestCase(RankMeTestCase):
             start_date=timezone.now() - timedelta(days=1)
         )
         self.assertIn(c, Competition.ongoing_objects.all())
+
+    def test_get_summaries_groups_competitions_by_status(self):
+        past = CompetitionFactory(end_date=timezone.now() - timedelta(days=1))
+        upcoming = CompetitionFactory(
+            start_date=timezone.now() + timedelta(days=1)
+        )
+        ongoing = CompetitionFactory(end_date=None)
+
+        summaries = Competition.objects.get_summaries()
+
+        self.assertEqual(list(summaries), ['upcoming', 'ongoing', 'past'])
+        self.assertEqual(summaries['upcoming'], [upcoming])
+        self.assertEqual(summaries['ongoing'], [ongoing])
+        self.assertEqual(summaries['past'], [past])
+
+    def test_get_summaries_runs_a_single_query(self):
+        users = [UserFactory() for _ in range(3)]
+        competition = CompetitionFactory(end_date=None)
+        competition.add_game(users[0], users[1])
+        last_game = competition.add_game(users[0], users[2])
+        CompetitionFactory(end_date=None)
+
+        with self.assertNumQueries(1):
+            summaries = Competition.objects.get_summaries()
+
+        summary, empty_summary = sorted(summaries['ongoing'],
+                                        key=lambda c: c.id)
+        self.assertEqual(summary.nb_players, competition.players.count())
+        self.assertEqual(summary.nb_games, 2)
+        self.assertEqual(summary.last_game_date, last_game.date)
+        self.assertEqual(summary.leader['id'], users[0].id)
+        self.assertEqual(empty_summary.nb_games, 0)
+        self.assertIsNone(empty_summary.last_game_date)
+        self.assertIsNone(empty_summary.leader)
+
+    def test_get_played_by(self):
+        users = [UserFactory() for _ in range(3)]
+        competition = CompetitionFactory()
+        competition.add_game(users[1], users[0])
+        last_game = competition.add_game(users[1], users[2])
+        other_competition = CompetitionFactory(
+            start_date=competition.start_date - timedelta(days=1)
+        )
+        other_competition.add_game(users[2], users[0])
+        CompetitionFactory(
+            start_date=competition.start_date - timedelta(days=2)
+        ).add_game(users[0], users[2])
+
+        with self.assertNumQueries(1):
+            competitions = Competition.objects.get_played_by(users[2])
+
+        self.assertEqual(competitions[0], competition)
+        self.assertEqual(competitions[0].ranking, 2)
+        self.assertEqual(competitions[0].nb_games, 1)
+        self.assertEqual(competitions[0].last_game_date, last_game.date)
+        self.assertEqual(
+            competitions[0].mu,
+            competition.scores.get(player=users[2]).score
+        )
+        self.assertEqual(competitions[1], other_competition)
+        self.assertEqual(competitions[1].ranking, 1)
+        self.assertEqual(len(competitions), 3)
+
+    def test_get_score_board_at_game(self):
+        users = [UserFactory() for _ in range(3)]
+        competition = CompetitionFactory()
+        first_game = competition.add_game(users[0], users[1])
+        competition.add_game(users[1], users[0])
+        competition.add_game(users[1], users[2])
+
+        with self.assertNumQueries(1):
+            score_board = competition.get_score_board_at(first_game.id)
+
+        self.assertEqual([row['player_id'] for row in score_board],
+                         [users[0].id, users[1].id])
+        self.assertEqual(
+            score_board[0]['mu'],
+            first_game.historical_scores.get(player=users[0]).score
+        )
+
+    def test_get_score_board_at_date(self):
+        users = [UserFactory() for _ in range(2)]
+        competition = CompetitionFactory(
+            start_date=timezone.now() - timedelta(days=10)
+        )
+        competition.add_game(users[0], users[1])
+        game = competition.add_game(users[1], users[0])
+        game.date = timezone.now() + timedelta(days=1)
+        game.save()
+
+        score_board = competition.get_score_board_at(timezone.now())
+        self.assertEqual(score_board[0]['player_id'], users[0].id)
+        self.assertEqual(len(competition.get_score_board_at(
+            timezone.now() - timedelta(days=5)
+        )), 0)
+
+
+class CompetitionRankingTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.competition = CompetitionFactory()
+        self.users = [UserFactory() for _ in range(4)]
+
+        for user, score in zip(self.users, (30, 25, 25, 20)):
+            Score.objects.create(competition=self.competition, player=user,
+                                 score=score)
+
+    def test_tied_players_share_the_same_rank(self):
+        rankings = self.competition.get_ranking_by_player()
+
+        self.assertEqual([rankings[user] for user in self.users],
+                         [1, 2, 2, 4])
+
+    def test_score_board_is_ranked_by_the_database(self):
+        with self.assertNumQueries(1):
+            rankings = [score.ranking
+                        for score in self.competition.get_score_board()]
+
+        self.assertEqual(rankings, [1, 2, 2, 4])
+
+    def test_get_leaderboard_slice(self):
+        leaderboard = Score.objects.get_leaderboard(self.competition.id,
+                                                    offset=2, limit=2)
+
+        # Tied players are sorted by descending id
+        self.assertEqual([entry['player_id'] for entry in leaderboard],
+                         [self.users[1].id, self.users[3].id])
+        self.assertEqual([entry['rank'] for entry in leaderboard], [2, 4])
+
+    def test_get_player_ranking(self):
+        entry = self.competition.get_player_ranking(self.users[3])
+
+        self.assertEqual(entry['rank'], 4)
+        self.assertEqual(entry['mu'], 20)
+        self.assertIsNone(
+            self.competition.get_player_ranking(UserFactory())
+        )
+
+    def test_get_leaderboard_around(self):
+        leaderboard = self.competition.get_leaderboard_around(self.users[1],
+                                                              size=1)
+
+        # Tied players are sorted by descending id
+        self.assertEqual([entry['player_id'] for entry in leaderboard],
+                         [self.users[2].id, self.users[1].id,
+                          self.users[3].id])
+        self.assertEqual([entry['rank'] for entry in leaderboard], [2, 2, 4])
+
+    def test_get_leaderboard_around_matches_leaderboard(self):
+        leaderboard = Score.objects.get_leaderboard(self.competition.id)
+
+        for position, entry in enumerate(leaderboard):
+            around = Score.objects.get_leaderboard_around(
+                self.competition.id, entry['player_id'], 2
+            )
+            self.assertEqual(around,
+                             leaderboard[max(position - 2, 0):position + 3])
+
+    def test_get_leaderboard_around_player_without_score(self):
+        self.assertEqual(
+            self.competition.get_leaderboard_around(UserFactory()), []
+        )
+
+    def test_conservative_ranking_order(self):
+        competition = CompetitionFactory(
+            ranking_order=Competition.RANKING_CONSERVATIVE
+        )
+        Score.objects.create(competition=competition, player=self.users[0],
+                             score=30, stdev=8)
+        Score.objects.create(competition=competition, player=self.users[1],
+                             score=25, stdev=1)
+
+        self.assertEqual(
+            [score.player for score in competition.get_score_board()],
+            [self.users[1], self.users[0]]
+        )
+        self.assertEqual(competition.get_player_ranking(self.users[0])['rank'],
+                         2)
+
+    def test_conservative_ranking_order_at_game(self):
+        competition = CompetitionFactory(
+            ranking_order=Competition.RANKING_CONSERVATIVE
+        )
+        game = Game.objects.create(competition=competition,
+                                   winner=self.users[0], loser=self.users[1])
+        HistoricalScore.objects.create(game=game, player=self.users[0],
+                                       score=30, stdev=8)
+        HistoricalScore.objects.create(game=game, player=self.users[1],
+                                       score=25, stdev=1)
+
+        self.assertEqual(
+            [entry['player_id']
+             for entry in competition.get_score_board_at(game.id)],
+            [self.users[1].id, self.users[0].id]
+        )
+
+
+class CompetitionMembershipTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.competition = CompetitionFactory()
+
+    def count_add_queries(self, users):
+        with CaptureQueriesContext(connection) as context:
+            self.competition.add_users_access(users)
+
+        return len(context.captured_queries)
+
+    def test_add_users_access_runs_constant_number_of_queries(self):
+        nb_queries = self.count_add_queries([UserFactory() for _ in range(2)])
+
+        self.assertEqual(
+            self.count_add_queries([UserFactory() for _ in range(20)]),
+            nb_queries
+        )
+        self.assertEqual(self.competition.players.count(), 22)
+        self.assertEqual(Event.objects.filter(
+            competition=self.competition,
+            event_type=Event.TYPE_USER_JOINED_COMPETITION
+        ).count(), 22)
+
+    def test_add_users_access_ignores_existing_players(self):
+        users = [UserFactory() for _ in range(3)]
+        self.competition.add_users_access(users[:2])
+
+        added_users = self.competition.add_users_access(
+            users + [self.competition.creator]
+        )
+
+        self.assertEqual(added_users, [users[2]])
+        self.assertEqual(self.competition.players.count(), 3)
+
+    def test_remove_users_access(self):
+        users = [UserFactory() for _ in range(3)]
+        self.competition.add_users_access(users)
+
+        removed_users = self.competition.remove_users_access(
+            [users[0], users[1], UserFactory()]
+        )
+
+        self.assertEqual(removed_users, users[:2])
+        self.assertEqual(list(self.competition.players.all()), [users[2]])
+        self.assertEqual(Event.objects.filter(
+            competition=self.competition,
+            event_type=Event.TYPE_USER_LEFT_COMPETITION
+        ).count(), 2)
+
+    def test_creator_cannot_be_removed(self):
+        with self.assertRaises(CannotLeaveCompetitionError):
+            self.competition.remove_users_access([self.competition.creator])
@@ -1,5 +1,7 @@
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import connection
 from django.dispatch import receiver
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 import mock
@@ -103,3 +105,31 @@ class GameTestCase(RankMeTestCase):
     def test_get_opponent_returns_opponent(self):
         game = self.default_competition.add_game(self.users[0], self.users[1])
         self.assertEqual(game.get_opponent(self.users[0]), self.users[1])
+
+
+class AnnounceQueryBudgetTestCase(RankMeTestCase):
+    # Maximum number of queries run to announce a game between two players
+    # who already played in the competition. Their players and profiles are
+    # loaded with a query of their own since the scores are locked alone. The
+    # summaries are only updated once the announce is committed
+    ANNOUNCE_QUERY_BUDGET = 12
+
+    def get_announce_queries(self, nb_players):
+        competition = CompetitionFactory()
+        users = [UserFactory() for _ in range(nb_players)]
+
+        for opponent in users[1:]:
+            competition.add_game(users[0], opponent)
+
+        # Both players lost their only game, so the rankings change the same
+        # way whatever the number of players
+        with CaptureQueriesContext(connection) as context:
+            competition.add_game(users[-1], users[1])
+
+        return len(context.captured_queries)
+
+    def test_announce_runs_a_constant_number_of_queries(self):
+        nb_queries = self.get_announce_queries(3)
+
+        self.assertLessEqual(nb_queries, self.ANNOUNCE_QUERY_BUDGET)
+        self.assertEqual(self.get_announce_queries(30), nb_queries)
@@ -0,0 +1,111 @@
+from trueskill import Rating, rate_1vs1
+
+from rankme.tests import RankMeTestCase, RankMeTransactionTestCase
+
+from ... import prediction
+from ...replay import recalculate_competition
+from ...scoring import score_pending_games
+from ..factories import CompetitionFactory, UserFactory
+
+
+class PredictionTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.users = [UserFactory() for _ in range(3)]
+        self.competition = CompetitionFactory()
+        self.competition.add_game(self.users[0], self.users[1])
+        self.competition.add_game(self.users[0], self.users[2])
+
+    def get_snapshot(self):
+        return prediction.get_scores_snapshot(
+            self.competition.id,
+            prediction.get_competition_version(self.competition.id)
+        )
+
+    def test_prediction_doesnt_write(self):
+        snapshot = self.get_snapshot()
+
+        with self.assertNumQueries(0):
+            prediction.predict_game(snapshot, self.users[1].id,
+                                    self.users[0].id)
+
+    def test_leader_is_favourite(self):
+        result = prediction.predict_game(self.get_snapshot(),
+                                         self.users[0].id, self.users[1].id)
+
+        self.assertGreater(result['win_probability'], 0.5)
+        self.assertEqual(result['current']['player1']['ranking'], 1)
+
+    def test_outcome_matches_trueskill(self):
+        score1 = self.competition.get_score(self.users[1])
+        score2 = self.competition.get_score(self.users[2])
+        expected1, expected2 = rate_1vs1(Rating(score1.score, score1.stdev),
+                                         Rating(score2.score, score2.stdev))
+
+        result = prediction.predict_game(self.get_snapshot(),
+                                         self.users[1].id, self.users[2].id)
+        outcome = result['if_player1_wins']
+
+        self.assertAlmostEqual(outcome['player1']['mu'], expected1.mu)
+        self.assertAlmostEqual(outcome['player2']['sigma'], expected2.sigma)
+
+    def test_snapshot_is_refreshed_after_new_game(self):
+        snapshot = self.get_snapshot()
+        self.assertIs(self.get_snapshot(), snapshot)
+
+        self.competition.add_game(self.users[1], self.users[2])
+        self.assertIsNot(self.get_snapshot(), snapshot)
+
+    def test_version_changes_once_deferred_game_is_rated(self):
+        version = prediction.get_competition_version(self.competition.id)
+        self.competition.deferred_scoring = True
+        self.competition.save()
+
+        self.competition.add_game(self.users[1], self.users[2])
+        self.assertEqual(
+            prediction.get_competition_version(self.competition.id), version
+        )
+
+        score_pending_games(self.competition.id)
+        self.assertNotEqual(
+            prediction.get_competition_version(self.competition.id), version
+        )
+
+    def test_conservative_snapshot_ranks_by_conservative_score(self):
+        snapshot = prediction.ScoresSnapshot(
+            {self.users[0].id: Rating(30, 8), self.users[1].id: Rating(25, 1)},
+            field='conservative_score'
+        )
+
+        self.assertEqual(snapshot.get_ranking(self.users[1].id), 1)
+        self.assertEqual(snapshot.get_ranking(self.users[0].id), 2)
+
+    def test_version_changes_with_ranking_order(self):
+        version = prediction.get_competition_version(self.competition.id)
+        self.competition.ranking_order = self.competition.RANKING_CONSERVATIVE
+        self.competition.save()
+
+        self.assertNotEqual(
+            prediction.get_competition_version(self.competition.id), version
+        )
+
+    def test_player_cant_play_against_themselves(self):
+        with self.assertRaises(ValueError):
+            prediction.predict_game(self.get_snapshot(), self.users[0].id,
+                                    self.users[0].id)
+
+
+class PredictionVersionTestCase(RankMeTransactionTestCase):
+    # The version changes once the rewrite of the scores is committed
+    def test_version_changes_after_recalculation(self):
+        users = [UserFactory() for _ in range(2)]
+        competition = CompetitionFactory()
+        competition.add_game(users[0], users[1])
+        version = prediction.get_competition_version(competition.id)
+
+        recalculate_competition(competition.id, 30, 5)
+
+        self.assertNotEqual(
+            prediction.get_competition_version(competition.id), version
+        )
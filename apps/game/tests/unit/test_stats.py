@@ -1,3 +1,5 @@
+import json
+
 from freezegun import freeze_time
 
 from rankme.tests import RankMeTestCase
@@ -35,3 +37,37 @@ class StatsTestCase(RankMeTestCase):
         # That's monday
         with freeze_time('2016-03-28'):
             self.assertEqual(len(stats.get_stats_per_week(users[0], 3)), 1)
+
+    def test_get_latest_results_columnar_has_parallel_arrays(self):
+        users = [UserFactory() for _ in range(3)]
+        competition = CompetitionFactory()
+        games = [
+            competition.add_game(users[0], users[1]),
+            competition.add_game(users[2], users[0]),
+        ]
+
+        results = json.loads(
+            stats.get_latest_results_columnar(competition, 10, precision=1)
+        )
+
+        self.assertEqual(results['games'], [game.id for game in games])
+
+        player_results = results['players'][users[0].profile.get_short_name()]
+        self.assertEqual(player_results['flags'], [3, 1])
+        self.assertEqual(len(player_results['positions']), 2)
+        self.assertEqual(player_results['skills'][0],
+                         round(games[0].historical_scores.get(
+                             player=users[0]).score, 1))
+
+    def test_get_latest_results_ignores_pending_games(self):
+        users = [UserFactory() for _ in range(2)]
+        competition = CompetitionFactory()
+        game = competition.add_game(users[0], users[1])
+        competition.deferred_scoring = True
+        competition.save()
+        competition.add_game(users[1], users[0])
+
+        results = stats.get_latest_results_by_player(competition, 10)
+
+        self.assertEqual([result['game'] for result in results[users[0]]],
+                         [game.id])
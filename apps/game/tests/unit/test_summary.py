@@ -0,0 +1,110 @@
+from django.core.cache import cache
+
+from rankme.tests import RankMeTransactionTestCase
+
+from ...models import PlayerSummary
+from ...scoring import score_pending_games
+from ...summary import get_player_overview
+from ..factories import CompetitionFactory, UserFactory
+
+
+class PlayerSummaryTestCase(RankMeTransactionTestCase):
+    # The summaries are updated once the announce is committed
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+        self.competition = CompetitionFactory()
+        self.users = [UserFactory() for _ in range(3)]
+
+    def test_announce_updates_the_summaries(self):
+        self.competition.add_game(self.users[0], self.users[1])
+        CompetitionFactory().add_game(self.users[0], self.users[2])
+        self.competition.add_game(self.users[1], self.users[0])
+
+        summary = PlayerSummary.objects.get(player=self.users[0])
+        self.assertEqual((summary.wins, summary.losses), (2, 1))
+        self.assertEqual(summary.get_favourite_opponent(),
+                         (self.users[1].id, 1, 1))
+        self.assertEqual(len(summary.trend), 3)
+        self.assertGreater(summary.trend[0], 0)
+        self.assertLess(summary.trend[-1], 0)
+
+    def test_incremental_summary_matches_rebuilt_one(self):
+        for winner, loser in ((0, 1), (1, 2), (2, 0), (0, 1)):
+            self.competition.add_game(self.users[winner], self.users[loser])
+
+        summary = PlayerSummary.objects.get(player=self.users[0])
+        rebuilt_summary = PlayerSummary.objects.rebuild([self.users[0].id])[0]
+
+        self.assertEqual(rebuilt_summary.wins, summary.wins)
+        self.assertEqual(rebuilt_summary.losses, summary.losses)
+        self.assertEqual(rebuilt_summary.opponents, summary.opponents)
+        self.assertEqual([round(delta, 6) for delta in rebuilt_summary.trend],
+                         [round(delta, 6) for delta in summary.trend])
+
+    def test_deferred_games_are_added_to_new_summaries(self):
+        self.competition.deferred_scoring = True
+        self.competition.save()
+
+        for winner, loser in ((0, 1), (0, 2), (1, 0)):
+            self.competition.add_game(self.users[winner], self.users[loser])
+
+        score_pending_games(self.competition.id)
+
+        summaries = {summary.player_id: summary
+                     for summary in PlayerSummary.objects.all()}
+        self.assertEqual(
+            (summaries[self.users[0].id].wins,
+             summaries[self.users[0].id].losses),
+            (2, 1)
+        )
+        self.assertEqual(len(summaries[self.users[0].id].trend), 3)
+
+        for rebuilt_summary in PlayerSummary.objects.rebuild(
+                user.id for user in self.users):
+            summary = summaries[rebuilt_summary.player_id]
+            self.assertEqual(rebuilt_summary.opponents, summary.opponents)
+            self.assertEqual(len(rebuilt_summary.trend), len(summary.trend))
+
+    def test_deleted_game_is_removed_from_the_summaries(self):
+        self.competition.add_game(self.users[0], self.users[1])
+        game = self.competition.add_game(self.users[0], self.users[1])
+        game.delete()
+
+        summary = PlayerSummary.objects.get(player=self.users[1])
+        self.assertEqual((summary.wins, summary.losses), (0, 1))
+        self.assertEqual(len(summary.trend), 1)
+
+    def test_overview_of_player_without_games(self):
+        overview = get_player_overview(self.users[0])
+
+        self.assertEqual(overview['nb_games'], 0)
+        self.assertIsNone(overview['best_ranking'])
+        self.assertIsNone(overview['favourite_opponent'])
+        self.assertEqual(overview['competitions'], [])
+
+
+class PlayerOverviewCacheTestCase(RankMeTransactionTestCase):
+    # The cached overviews are invalidated once the transaction is committed
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+        self.competition = CompetitionFactory()
+        self.users = [UserFactory() for _ in range(2)]
+
+    def test_overview_is_cached_until_the_player_plays(self):
+        self.competition.add_game(self.users[0], self.users[1])
+        get_player_overview(self.users[0])
+
+        with self.assertNumQueries(0):
+            overview = get_player_overview(self.users[0])
+
+        self.assertEqual(overview['wins'], 1)
+        self.assertEqual(overview['best_ranking']['ranking'], 1)
+        self.assertEqual(overview['favourite_opponent']['id'],
+                         self.users[1].id)
+
+        self.competition.add_game(self.users[1], self.users[0])
+        self.assertEqual(get_player_overview(self.users[0])['losses'], 1)
@@ -145,3 +145,18 @@ class TestTeamSignals(RankMeTestCase):
                           competition=self.default_competition),
             ]
         )
+
+    def test_newcomer_doesnt_change_the_old_ranking_of_their_opponent(self):
+        ranking_changed_receiver = receiver(ranking_changed)(mock.Mock())
+
+        christoph, laurent, rolf = (UserFactory() for i in range(3))
+
+        self.default_competition.add_game(rolf, christoph)
+        game = self.default_competition.add_game(laurent, christoph)
+
+        self.assertIn(
+            mock.call(player=christoph, old_ranking=2, sender=game,
+                      new_ranking=3, signal=mock.ANY,
+                      competition=self.default_competition),
+            ranking_changed_receiver.call_args_list
+        )
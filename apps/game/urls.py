@@ -7,6 +7,7 @@ competition_patterns = [
     url(r'^edit/$', views.competition_edit, name='competition_edit'),
     url(r'^scores/$', views.competition_detail_score_chart, name='competition_detail_score_chart'),
     url(r'^scores/(?P<start>\d+)$', views.competition_detail_score_chart, name='competition_detail_score_chart_with_start'),
+    url(r'^export/games\.(?P<export_format>csv|ndjson)$', views.competition_export, name='competition_export'),
     url(r'^game/new/$', views.game_add, name='game_add'),
     url(r'^game/remove/$', views.game_remove, name='game_remove'),
     url(r'^player/(?P<player_id>\d+)/$', views.player_detail, name='player_detail'),
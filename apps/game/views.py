@@ -3,30 +3,53 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse
 from django.db.models.query_utils import Q
-from django.http.response import HttpResponse
+from django.http.response import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.utils.translation import ugettext_lazy as _
 from django.views.decorators.http import require_POST
 
-from . import stats
+from rankme.routers import read_from_replica
+
+from . import snapshot as competition_snapshot, stats
 from .decorators import authorized_user, user_is_admin
+from .export import EXPORT_FORMATS
 from .forms import GameForm, CompetitionForm
 from .models import Competition, Game, Score
+from .summary import get_player_overview
 
 
 @login_required
 def competition_list_all(request):
+    summaries = Competition.objects.get_summaries()
+
     return render(request, 'competition/list_all.html', {
-        'upcoming_competitions': Competition.upcoming_objects.all(),
-        'ongoing_competitions': Competition.ongoing_objects.all(),
-        'past_competitions': Competition.past_objects.all()
+        'upcoming_competitions': summaries['upcoming'],
+        'ongoing_competitions': summaries['ongoing'],
+        'past_competitions': summaries['past']
     })
 
 
 @login_required
 @authorized_user
+@read_from_replica
 def player_detail(request, competition_slug, player_id):
-    competition = get_object_or_404(Competition, slug=competition_slug)
+    competition = get_object_or_404(
+        Competition.objects.select_related('snapshot'), slug=competition_slug
+    )
+    snapshot = competition.get_snapshot()
+
+    if snapshot is not None:
+        context = competition_snapshot.get_player_context(snapshot,
+                                                          player_id)
+
+        if context is not None:
+            context.update({
+                'competition': competition,
+                'stats_per_week': stats.get_stats_per_week(context['player']),
+            })
+
+            return render(request, 'game/player.html', context)
+
     player = get_object_or_404(get_user_model(), pk=player_id)
 
     head2head = stats.get_head2head(player, competition)
@@ -57,10 +80,14 @@ def player_detail(request, competition_slug, player_id):
 
 
 @login_required
+@read_from_replica
 def player_general_detail(request, player_id):
     player = get_object_or_404(get_user_model(), pk=player_id)
 
-    return render(request, 'game/player_general.html', {'player': player})
+    return render(request, 'game/player_general.html', {
+        'player': player,
+        'overview': get_player_overview(player),
+    })
 
 
 @login_required
@@ -87,18 +114,27 @@ def competition_detail(request, competition_slug):
     User not logged => login page
     User not authorized in competition => request access page
     """
-    competition = get_object_or_404(Competition, slug=competition_slug)
-
-    latest_results = competition.get_latest_games()
-    score_board = competition.get_score_board()
+    competition = get_object_or_404(
+        Competition.objects.select_related('snapshot'), slug=competition_slug
+    )
+    snapshot = competition.get_snapshot()
 
-    context = {
-        'latest_results': latest_results,
-        'score_board': score_board,
+    if snapshot is not None:
+        context = competition_snapshot.get_detail_context(snapshot)
+    else:
+        context = {
+            'latest_results': competition.get_latest_games(),
+            'score_board': competition.get_score_board(),
+            'leaderboard_around_me': competition.get_leaderboard_around(
+                request.user
+            ),
+        }
+
+    context.update({
         'competition': competition,
         'user_can_edit_competition': competition.user_has_write_access(request.user),
         'user_is_admin_of_competition': competition.user_is_admin(request.user)
-    }
+    })
 
     return render(request, 'competition/detail.html', context)
 
@@ -127,14 +163,52 @@ def competition_edit(request, competition_slug):
 
 @login_required
 @authorized_user
+@read_from_replica
 def competition_detail_score_chart(request, competition_slug, start=0):
-    competition = get_object_or_404(Competition, slug=competition_slug)
-    score_chart_data = stats.get_latest_results_by_player(
-        competition, 50, int(start), True
+    competition = get_object_or_404(
+        Competition.objects.select_related('snapshot'), slug=competition_slug
     )
+    snapshot = competition.get_snapshot()
+
+    if snapshot is not None and int(start) == 0 and not request.GET:
+        score_chart_data = competition_snapshot.get_score_chart(snapshot)
+    elif request.GET.get('format') == 'columnar':
+        try:
+            precision = int(request.GET['precision'])
+        except (KeyError, ValueError):
+            precision = None
+
+        score_chart_data = stats.get_latest_results_columnar(
+            competition, 50, int(start), precision
+        )
+    else:
+        score_chart_data = stats.get_latest_results_by_player(
+            competition, 50, int(start), True
+        )
+
     return HttpResponse(score_chart_data, content_type='application/json')
 
 
+@login_required
+@authorized_user
+def competition_export(request, competition_slug, export_format):
+    competition = get_object_or_404(Competition, slug=competition_slug)
+
+    try:
+        export, content_type = EXPORT_FORMATS[export_format]
+    except KeyError:
+        raise Http404()
+
+    response = StreamingHttpResponse(export(competition),
+                                     content_type=content_type)
+    response['Content-Disposition'] = (
+        'attachment; filename="%s-games.%s"' % (competition.slug,
+                                                export_format)
+    )
+
+    return response
+
+
 @login_required
 def competition_join(request, competition_slug):
     competition = get_object_or_404(Competition, slug=competition_slug)
@@ -0,0 +1,179 @@
+from collections import defaultdict
+import json
+import logging
+import queue
+import select
+import threading
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBroadcaster:
+    """
+    Dispatch competition events to the subscribers of the current process.
+    Every subscriber gets its own queue, so that an idle subscriber just
+    sleeps on it.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, competition_id):
+        subscriber = queue.Queue(maxsize=settings.LIVE_SUBSCRIBER_QUEUE_SIZE)
+
+        with self.lock:
+            self.subscribers[competition_id].add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, competition_id, subscriber):
+        with self.lock:
+            self.subscribers[competition_id].discard(subscriber)
+
+            if not self.subscribers[competition_id]:
+                del self.subscribers[competition_id]
+
+    def publish(self, competition_id, event_type, data):
+        self.dispatch(competition_id, event_type, data)
+
+    def dispatch(self, competition_id, event_type, data):
+        with self.lock:
+            subscribers = list(self.subscribers.get(competition_id, ()))
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event_type, data))
+            except queue.Full:
+                # The client doesn't read its events anymore, there's no
+                # point in blocking the publisher for it
+                logger.warning("Dropping %s event for a slow subscriber of"
+                               " competition %s", event_type, competition_id)
+
+
+class PostgresBroadcaster(LocalBroadcaster):
+    """
+    Dispatch competition events to the subscribers of all the processes
+    through Postgres LISTEN/NOTIFY. Each process listens on its own
+    connection in a background thread, started with the first subscription,
+    which reconnects with an exponential backoff when the connection is lost.
+    """
+    channel = 'rankme_live'
+    # Number of seconds between two checks of the stop flag by the listener
+    poll_timeout = 5
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+        self.listening = threading.Event()
+        self.stopped = threading.Event()
+
+    def subscribe(self, competition_id):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self.listen,
+                                                 daemon=True)
+                self.listener.start()
+
+        return super().subscribe(competition_id)
+
+    def publish(self, competition_id, event_type, data):
+        payload = json.dumps({
+            'competition_id': competition_id,
+            'event_type': event_type,
+            'data': data,
+        })
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def stop(self):
+        """
+        Stop the listener thread, which closes its connection.
+        """
+        self.stopped.set()
+
+        if self.listener is not None:
+            self.listener.join()
+
+    def listen(self):
+        delay = settings.LIVE_LISTENER_RETRY_DELAY
+
+        while not self.stopped.is_set():
+            try:
+                listen_connection = self.connect()
+            except Exception:
+                logger.exception("Live events listener can't connect")
+            else:
+                delay = settings.LIVE_LISTENER_RETRY_DELAY
+
+                try:
+                    self.receive(listen_connection)
+                except Exception:
+                    logger.exception("Live events listener disconnected")
+                finally:
+                    self.listening.clear()
+                    listen_connection.close()
+
+            if self.stopped.wait(delay):
+                break
+
+            delay = min(delay * 2, settings.LIVE_LISTENER_MAX_RETRY_DELAY)
+
+    def connect(self):
+        database = connections['default']
+        listen_connection = database.get_new_connection(
+            database.get_connection_params()
+        )
+        listen_connection.autocommit = True
+
+        with listen_connection.cursor() as cursor:
+            cursor.execute('LISTEN %s' % self.channel)
+
+        self.listening.set()
+
+        return listen_connection
+
+    def receive(self, listen_connection):
+        while not self.stopped.is_set():
+            if select.select([listen_connection], [], [],
+                             self.poll_timeout) == ([], [], []):
+                continue
+
+            listen_connection.poll()
+
+            while listen_connection.notifies:
+                notify = listen_connection.notifies.pop(0)
+
+                try:
+                    message = json.loads(notify.payload)
+                    competition_id = message['competition_id']
+                    event_type = message['event_type']
+                    data = message['data']
+                except (ValueError, TypeError, KeyError):
+                    logger.warning("Ignoring malformed live event: %r",
+                                   notify.payload)
+                    continue
+
+                self.dispatch(competition_id, event_type, data)
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """
+    Return the broadcaster of the current process, as configured by the
+    ``LIVE_BROADCASTER`` setting.
+    """
+    global _broadcaster
+
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            _broadcaster = import_string(settings.LIVE_BROADCASTER)()
+
+    return _broadcaster
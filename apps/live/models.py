@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.dispatch import receiver
+
+from ..game.signals import game_played, ranking_changed
+from .broadcast import get_broadcaster
+
+
+def publish_on_commit(competition_id, event_type, get_data):
+    """
+    Publish the event once the current transaction is committed, so that
+    subscribers never see a game that could still be rolled back and the data
+    reflects the final scores of the game.
+    """
+    transaction.on_commit(lambda: get_broadcaster().publish(
+        competition_id, event_type, get_data()
+    ))
+
+
+@receiver(game_played)
+def publish_game_played(sender, **kwargs):
+    def get_data():
+        return {
+            'game_id': sender.id,
+            'winner_id': sender.winner_id,
+            'loser_id': sender.loser_id,
+            'date': sender.date.isoformat(),
+            'scores': [
+                {
+                    'player_id': historical_score.player_id,
+                    'score': historical_score.score,
+                    'stdev': historical_score.stdev,
+                }
+                for historical_score in sender.historical_scores.all()
+            ],
+        }
+
+    publish_on_commit(sender.competition_id, 'game_played', get_data)
+
+
+@receiver(ranking_changed)
+def publish_ranking_changed(sender, player, old_ranking, new_ranking,
+                            competition, **kwargs):
+    def get_data():
+        return {
+            'game_id': sender.id,
+            'player_id': player.id,
+            'old_ranking': old_ranking,
+            'new_ranking': new_ranking,
+        }
+
+    publish_on_commit(competition.id, 'ranking_changed', get_data)
@@ -0,0 +1,135 @@
+import json
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import override_settings
+
+import mock
+
+from rankme.tests import RankMeTestCase, RankMeTransactionTestCase
+from ..game.tests.factories import CompetitionFactory, UserFactory
+from .broadcast import LocalBroadcaster, PostgresBroadcaster
+
+
+class LocalBroadcasterTestCase(RankMeTestCase):
+    def test_events_are_dispatched_to_competition_subscribers(self):
+        broadcaster = LocalBroadcaster()
+        subscriber = broadcaster.subscribe(1)
+        other_subscriber = broadcaster.subscribe(2)
+
+        broadcaster.publish(1, 'game_played', {'game_id': 42})
+
+        self.assertEqual(subscriber.get_nowait(),
+                         ('game_played', {'game_id': 42}))
+        self.assertTrue(other_subscriber.empty())
+
+    def test_unsubscribed_subscribers_dont_get_events(self):
+        broadcaster = LocalBroadcaster()
+        subscriber = broadcaster.subscribe(1)
+        broadcaster.unsubscribe(1, subscriber)
+
+        broadcaster.publish(1, 'game_played', {'game_id': 42})
+
+        self.assertTrue(subscriber.empty())
+
+    @override_settings(LIVE_SUBSCRIBER_QUEUE_SIZE=1)
+    def test_slow_subscribers_dont_block_publisher(self):
+        broadcaster = LocalBroadcaster()
+        subscriber = broadcaster.subscribe(1)
+
+        broadcaster.publish(1, 'game_played', {'game_id': 1})
+        broadcaster.publish(1, 'game_played', {'game_id': 2})
+
+        self.assertEqual(subscriber.qsize(), 1)
+
+
+# The notifications are only delivered once the publishing transaction is
+# committed
+class PostgresBroadcasterTestCase(RankMeTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.broadcaster = PostgresBroadcaster()
+        self.broadcaster.poll_timeout = 0.1
+        self.subscriber = self.broadcaster.subscribe(1)
+        self.assertTrue(self.broadcaster.listening.wait(5))
+
+    def tearDown(self):
+        self.broadcaster.stop()
+        super().tearDown()
+
+    def test_events_are_dispatched_through_postgres(self):
+        self.broadcaster.publish(1, 'game_played', {'game_id': 42})
+
+        self.assertEqual(self.subscriber.get(timeout=5),
+                         ('game_played', {'game_id': 42}))
+
+    def test_malformed_events_dont_stop_the_listener(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)',
+                           [PostgresBroadcaster.channel, 'not json'])
+
+        self.broadcaster.publish(1, 'game_played', {'game_id': 42})
+
+        self.assertEqual(self.subscriber.get(timeout=5),
+                         ('game_played', {'game_id': 42}))
+        self.assertTrue(self.broadcaster.listener.is_alive())
+
+
+@mock.patch('apps.live.models.transaction.on_commit', lambda func: func())
+class LiveEventsTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.broadcaster = LocalBroadcaster()
+        self.patcher_broadcaster = mock.patch(
+            'apps.live.views.get_broadcaster', return_value=self.broadcaster
+        )
+        self.patcher_broadcaster.start()
+        self.patcher_models_broadcaster = mock.patch(
+            'apps.live.models.get_broadcaster', return_value=self.broadcaster
+        )
+        self.patcher_models_broadcaster.start()
+
+        self.user = UserFactory()
+        self.competition = CompetitionFactory(creator=self.user)
+        self.client.login(username=self.user.username, password='password')
+
+    def tearDown(self):
+        self.patcher_broadcaster.stop()
+        self.patcher_models_broadcaster.stop()
+        super().tearDown()
+
+    def test_game_announcement_publishes_events(self):
+        subscriber = self.broadcaster.subscribe(self.competition.id)
+        players = [UserFactory() for _ in range(2)]
+        game = self.competition.add_game(players[0], players[1])
+
+        event_type, data = subscriber.get_nowait()
+        self.assertEqual(event_type, 'game_played')
+        self.assertEqual(data['game_id'], game.id)
+
+        event_types = [subscriber.get_nowait()[0] for _ in range(2)]
+        self.assertEqual(event_types, ['ranking_changed'] * 2)
+
+    def test_events_stream(self):
+        response = self.client.get(reverse('competition_events', kwargs={
+            'competition_slug': self.competition.slug
+        }))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), b': connected\n\n')
+
+        self.broadcaster.publish(self.competition.id, 'game_played',
+                                 {'game_id': 42})
+        event = next(stream).decode()
+
+        self.assertTrue(event.startswith('event: game_played\n'))
+        self.assertEqual(json.loads(event.split('data: ')[1]),
+                         {'game_id': 42})
+
+        # Closing the response sends request_finished, which would close the
+        # connection holding the test transaction
+        with mock.patch.object(connection, 'close_if_unusable_or_obsolete'):
+            response.close()
@@ -0,0 +1,8 @@
+from django.conf.urls import url
+
+from . import views
+
+urlpatterns = [
+    url(r'^competitions/(?P<competition_slug>[\w-]+)/events/$',
+        views.competition_events, name='competition_events'),
+]
@@ -0,0 +1,57 @@
+import json
+import queue
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import connection
+from django.http.response import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from ..game.decorators import authorized_user
+from ..game.models import Competition
+from .broadcast import get_broadcaster
+
+
+def stream_events(competition_id):
+    """
+    Yield the events of the given competition formatted as server-sent
+    events, with a comment every ``LIVE_KEEPALIVE_INTERVAL`` seconds to keep
+    the connection open.
+    """
+    # The stream can stay open for hours, don't hold a database connection
+    # for nothing meanwhile
+    if not connection.in_atomic_block:
+        connection.close()
+
+    broadcaster = get_broadcaster()
+    subscriber = broadcaster.subscribe(competition_id)
+
+    try:
+        yield ': connected\n\n'
+
+        while True:
+            try:
+                event_type, data = subscriber.get(
+                    timeout=settings.LIVE_KEEPALIVE_INTERVAL
+                )
+            except queue.Empty:
+                yield ': keepalive\n\n'
+            else:
+                yield 'event: %s\ndata: %s\n\n' % (event_type,
+                                                   json.dumps(data))
+    finally:
+        broadcaster.unsubscribe(competition_id, subscriber)
+
+
+@login_required
+@authorized_user
+def competition_events(request, competition_slug):
+    competition = get_object_or_404(Competition, slug=competition_slug)
+
+    response = StreamingHttpResponse(stream_events(competition.id),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable nginx buffering, which would delay the events
+    response['X-Accel-Buffering'] = 'no'
+
+    return response
@@ -6,8 +6,8 @@ from django.dispatch import receiver
 from django.utils.translation import ugettext as _
 
 from ..game.signals import (
-    competition_created, game_played, ranking_changed,
-    user_joined_competition, user_left_competition
+    competition_created, game_played, rankings_changed,
+    users_joined_competition, users_left_competition
 )
 from ..game.models import Game
 
@@ -25,32 +25,32 @@ def publish_competition_created(sender, **kwargs):
     event.save()
 
 
-@receiver(user_joined_competition)
-def publish_user_joined_competition(sender, user, **kwargs):
-    event = Event(event_type=Event.TYPE_USER_JOINED_COMPETITION,
-                  competition=sender,
-                  details={
-                      'user': {
-                          'id': user.id,
-                          'name': user.profile.get_full_name(),
-                          'avatar': user.profile.avatar
-                      }
-                  })
-    event.save()
+def get_user_details(user):
+    return {
+        'id': user.id,
+        'name': user.profile.get_full_name(),
+        'avatar': user.profile.avatar
+    }
 
 
-@receiver(user_left_competition)
-def publish_user_left_competition(sender, user, **kwargs):
-    event = Event(event_type=Event.TYPE_USER_LEFT_COMPETITION,
-                  competition=sender,
-                  details={
-                      'user': {
-                          'id': user.id,
-                          'name': user.profile.get_full_name(),
-                          'avatar': user.profile.avatar
-                      }
-                  })
-    event.save()
+@receiver(users_joined_competition)
+def publish_users_joined_competition(sender, users, **kwargs):
+    Event.objects.bulk_create([
+        Event(event_type=Event.TYPE_USER_JOINED_COMPETITION,
+              competition=sender,
+              details={'user': get_user_details(user)})
+        for user in users
+    ])
+
+
+@receiver(users_left_competition)
+def publish_users_left_competition(sender, users, **kwargs):
+    Event.objects.bulk_create([
+        Event(event_type=Event.TYPE_USER_LEFT_COMPETITION,
+              competition=sender,
+              details={'user': get_user_details(user)})
+        for user in users
+    ])
 
 
 @receiver(game_played)
@@ -78,23 +78,27 @@ def delete_related_events(sender, instance, **kwargs):
     Event.objects.filter(details__game_id=instance.id).delete()
 
 
-@receiver(ranking_changed)
-def publish_ranking_changed(sender, player, old_ranking, new_ranking,
-                            competition, **kwargs):
-    player_details = {
-        "id": player.id,
-        "name": player.get_full_name(),
-        "avatar": player.profile.avatar,
-    }
+@receiver(rankings_changed)
+def publish_rankings_changed(sender, changes, **kwargs):
+    events = []
 
-    event = Event(event_type=Event.TYPE_RANKING_CHANGED,
-                  competition=competition, details={
-                      "player": player_details,
-                      "old_ranking": old_ranking,
-                      "new_ranking": new_ranking,
-                      "game_id": sender.id,
-                  })
-    event.save()
+    for change in changes:
+        player = change['player']
+        player_details = {
+            "id": player.id,
+            "name": player.get_full_name(),
+            "avatar": player.profile.avatar,
+        }
+
+        events.append(Event(event_type=Event.TYPE_RANKING_CHANGED,
+                            competition=sender, details={
+                                "player": player_details,
+                                "old_ranking": change['old_ranking'],
+                                "new_ranking": change['new_ranking'],
+                                "game_id": change['game'].id,
+                            }))
+
+    Event.objects.bulk_create(events)
 
 
 class EventManager(models.Manager):
@@ -4,6 +4,22 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 
+def get_display_name(first_name, last_name, username):
+    """
+    Return the name to display for a user, falling back to its username if
+    it has no first and last name. This allows to build the name from
+    ``values()`` rows without loading the user and its profile.
+    """
+    full_name = "%s %s" % (first_name, last_name)
+
+    if not full_name.strip():
+        display_name = username
+    else:
+        display_name = full_name
+
+    return display_name.title()
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, related_name='profile')
     avatar = models.CharField(max_length=255, blank=True)
@@ -12,14 +28,8 @@ class UserProfile(models.Model):
     slack = models.CharField(max_length=255, blank=True)
 
     def get_full_name(self):
-        full_name = "%s %s" % (self.user.first_name, self.user.last_name)
-
-        if not full_name.strip():
-            display_name = self.user.username
-        else:
-            display_name = full_name
-
-        return display_name.title()
+        return get_display_name(self.user.first_name, self.user.last_name,
+                                self.user.username)
 
     def get_short_name(self):
         full_name = "%s %s" % (self.user.first_name, self.user.last_name[0] + '.' if self.user.last_name else '')
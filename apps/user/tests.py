@@ -1,4 +1,6 @@
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rankme.tests import RankMeTestCase
 from ..game.tests.factories import CompetitionFactory, UserFactory
@@ -23,3 +25,18 @@ class UserTestCase(RankMeTestCase):
 
         response = self.client.get(reverse('profile'))
         self.assertEqual(response.status_code, 200)
+
+    def test_user_profile_page_runs_constant_number_of_queries(self):
+        user = UserFactory(password='foobar')
+        self.client.login(username=user.username, password='foobar')
+
+        def count_queries():
+            CompetitionFactory().add_game(user, UserFactory())
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse('profile'))
+
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(), count_queries())
@@ -3,17 +3,18 @@ from django.core.urlresolvers import reverse_lazy
 from django.http.response import HttpResponseRedirect
 from django.shortcuts import render
 
+from ..game.models import Competition
 from .forms import UserProfileForm, UserForm
 
 
 @login_required
 def index(request):
-    scores = request.user.scores.all()
+    competitions = Competition.objects.get_played_by(request.user)
 
     return render(request, 'user/profile.html', {
         'user': request.user,
         'profile': request.user.profile,
-        'scores': scores
+        'competitions': competitions
     })
 
 
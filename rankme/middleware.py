@@ -0,0 +1,198 @@
+from collections import Counter, defaultdict, deque
+import logging
+import re
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .routers import SAFE_METHODS, pin_to_primary
+
+logger = logging.getLogger(__name__)
+
+# Literals are stripped from the SQL so that queries only differing by their
+# parameters (typically the ones issued in a loop) end up with the same shape
+SQL_LITERALS_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SQL_IN_LIST_RE = re.compile(r"IN \((?:\?, )*\?\)")
+
+
+def get_query_shape(sql):
+    """
+    Return the given SQL query with all its literal values replaced by
+    placeholders.
+    """
+    shape = SQL_LITERALS_RE.sub('?', sql)
+    return SQL_IN_LIST_RE.sub('IN (...)', shape)
+
+
+def get_percentile(values, percentile):
+    """
+    Return the ``percentile`` (between 0 and 100) of the given list of values,
+    using the nearest-rank method.
+    """
+    if not values:
+        return None
+
+    values = sorted(values)
+    index = max(0, int(round(percentile / 100 * len(values))) - 1)
+
+    return values[min(index, len(values) - 1)]
+
+
+class QueryStatsRegistry:
+    """
+    Keep the latest ``window`` query samples of every view in memory, so that
+    rolling percentiles can be computed for them.
+    """
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = defaultdict(lambda: deque(maxlen=self.window))
+            self.duplicates = defaultdict(Counter)
+
+    def add_sample(self, view_name, nb_queries, sql_time, duplicates):
+        with self.lock:
+            self.samples[view_name].append((nb_queries, sql_time))
+            self.duplicates[view_name].update(duplicates)
+
+    def get_stats(self):
+        """
+        Return a dict {view_name: stats} with the rolling query count and SQL
+        time percentiles of every view, and its most frequent duplicate
+        queries.
+        """
+        with self.lock:
+            samples = {view: list(view_samples)
+                       for view, view_samples in self.samples.items()}
+            duplicates = {view: view_duplicates.most_common(10)
+                          for view, view_duplicates in self.duplicates.items()}
+
+        stats = {}
+        for view_name, view_samples in samples.items():
+            counts = [sample[0] for sample in view_samples]
+            times = [sample[1] for sample in view_samples]
+
+            stats[view_name] = {
+                'requests': len(view_samples),
+                'queries': {
+                    'p%d' % percentile: get_percentile(counts, percentile)
+                    for percentile in self.PERCENTILES
+                },
+                'sql_time_ms': {
+                    'p%d' % percentile: get_percentile(times, percentile)
+                    for percentile in self.PERCENTILES
+                },
+                'duplicate_queries': [
+                    {'sql': shape, 'count': count}
+                    for shape, count in duplicates.get(view_name, [])
+                ],
+            }
+
+        return stats
+
+
+query_stats = QueryStatsRegistry(
+    getattr(settings, 'QUERY_INSTRUMENTATION_WINDOW', 500)
+)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the number of SQL queries, the total SQL time and the duplicate
+    queries of every request, and log a warning when a view goes over its
+    query budget.
+
+    The middleware is disabled (and unloaded by Django) unless the
+    ``QUERY_INSTRUMENTATION_ENABLED`` setting is set. Budgets are configured
+    with ``QUERY_COUNT_BUDGETS``, a dict {view_name: max_queries}, and
+    ``QUERY_COUNT_DEFAULT_BUDGET`` for views that are not listed.
+    """
+    def __init__(self):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed()
+
+        self.budgets = getattr(settings, 'QUERY_COUNT_BUDGETS', {})
+        self.default_budget = getattr(settings, 'QUERY_COUNT_DEFAULT_BUDGET',
+                                      None)
+
+    def process_request(self, request):
+        request._query_instrumentation = {}
+
+        for connection in connections.all():
+            request._query_instrumentation[connection.alias] = (
+                connection.force_debug_cursor, len(connection.queries_log)
+            )
+            connection.force_debug_cursor = True
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_instrumentation_view = (
+            request.resolver_match.view_name if request.resolver_match
+            else '%s.%s' % (view_func.__module__, view_func.__name__)
+        )
+
+    def process_response(self, request, response):
+        state = getattr(request, '_query_instrumentation', None)
+        view_name = getattr(request, '_query_instrumentation_view', None)
+
+        if state is None:
+            return response
+
+        queries = []
+        for connection in connections.all():
+            if connection.alias not in state:
+                continue
+
+            force_debug_cursor, start = state[connection.alias]
+            connection.force_debug_cursor = force_debug_cursor
+            queries.extend(list(connection.queries_log)[start:])
+
+        if view_name is None:
+            return response
+
+        sql_time = sum(float(query['time']) for query in queries) * 1000
+        shapes = Counter(get_query_shape(query['sql']) for query in queries)
+        duplicates = {shape: count for shape, count in shapes.items()
+                      if count > 1}
+
+        query_stats.add_sample(view_name, len(queries), sql_time, duplicates)
+
+        budget = self.budgets.get(view_name, self.default_budget)
+        if budget is not None and len(queries) > budget:
+            logger.warning(
+                "View %s ran %d queries (budget: %d, %d duplicate), %.1f ms"
+                " spent in SQL", view_name, len(queries), budget,
+                sum(duplicates.values()), sql_time
+            )
+
+        return response
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pin the users who successfully wrote something (eg. announced a game) to
+    the primary database for a few seconds, so that the next pages they read
+    from the replica reflect their changes (see ``rankme.routers``).
+
+    The middleware is disabled (and unloaded by Django) unless the
+    ``REPLICA_DATABASE`` setting is set.
+    """
+    def __init__(self):
+        if settings.REPLICA_DATABASE is None:
+            raise MiddlewareNotUsed()
+
+    def process_response(self, request, response):
+        user = getattr(request, 'user', None)
+
+        if (request.method not in SAFE_METHODS and
+                response.status_code < 400 and
+                user is not None and user.is_authenticated()):
+            pin_to_primary(user)
+
+        return response
@@ -0,0 +1,101 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Apps whose models are always read from the primary database, so that
+# authentication doesn't depend on the replication lag
+PRIMARY_ONLY_APPS = ('sessions', 'authtoken')
+
+_state = threading.local()
+
+
+def get_pin_cache_key(user_id):
+    return 'db:primary-pin:%d' % user_id
+
+
+def pin_to_primary(user):
+    """
+    Send the reads of the requests of the user to the primary database for
+    the next ``REPLICA_PIN_TIMEOUT`` seconds, so that they see their own
+    writes even if the replica is lagging.
+    """
+    cache.set(get_pin_cache_key(user.id), True, settings.REPLICA_PIN_TIMEOUT)
+
+
+def is_pinned_to_primary(user):
+    return (user.is_authenticated() and
+            cache.get(get_pin_cache_key(user.id)) is not None)
+
+
+def can_read_from_replica(request):
+    """
+    Return True if the reads of the given request can be sent to the replica
+    database.
+    """
+    return (settings.REPLICA_DATABASE is not None and
+            request.method in SAFE_METHODS and
+            not is_pinned_to_primary(request.user))
+
+
+@contextmanager
+def replica_reads():
+    """
+    Send the reads run in the block to the replica database.
+    """
+    previous = getattr(_state, 'replica_reads', False)
+    _state.replica_reads = True
+
+    try:
+        yield
+    finally:
+        _state.replica_reads = previous
+
+
+def read_from_replica(view):
+    """
+    Decorator sending the reads of the decorated read-only view to the
+    replica database, unless the user just wrote something.
+    """
+    @wraps(view)
+    def decorator(request, *args, **kwargs):
+        if not can_read_from_replica(request):
+            return view(request, *args, **kwargs)
+
+        with replica_reads():
+            return view(request, *args, **kwargs)
+
+    return decorator
+
+
+class ReplicaRouter:
+    """
+    Send every write and, unless ``replica_reads`` is active, every read to
+    the default database. The replica database is set with the
+    ``REPLICA_DATABASE`` setting.
+    """
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, 'replica_reads', False) and
+                settings.REPLICA_DATABASE is not None and
+                model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return settings.REPLICA_DATABASE
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Objects read from the replica must still be saved on the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == settings.REPLICA_DATABASE:
+            return False
+
+        return None
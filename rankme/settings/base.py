@@ -19,6 +19,20 @@ DATABASES = {
     'default': dj_database_url.parse(get_env_variable('DATABASE_URL'))
 }
 
+# Read-only views can opt in to read from a replica (see rankme.routers)
+REPLICA_DATABASE = None
+if get_env_variable('REPLICA_DATABASE_URL', ''):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = dj_database_url.parse(
+        get_env_variable('REPLICA_DATABASE_URL')
+    )
+
+DATABASE_ROUTERS = ['rankme.routers.ReplicaRouter']
+# Number of seconds the reads of a user who just wrote something are sent to
+# the primary database. Pins are kept in the cache, which must be shared by
+# all the processes
+REPLICA_PIN_TIMEOUT = 10
+
 BASE_DIR = get_project_root_path()
 
 # Local time zone for this installation. Choices can be found here:
@@ -91,7 +105,18 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     # Uncomment the next line for simple clickjacking protection:
     # 'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'rankme.middleware.QueryInstrumentationMiddleware',
+    'rankme.middleware.PrimaryPinningMiddleware',
+)
+
+# Per-view SQL instrumentation, see rankme.middleware. Budgets are given as a
+# dict {view_name: max_queries}
+QUERY_INSTRUMENTATION_ENABLED = bool(
+    get_env_variable('QUERY_INSTRUMENTATION_ENABLED', False)
 )
+QUERY_INSTRUMENTATION_WINDOW = 500
+QUERY_COUNT_BUDGETS = {}
+QUERY_COUNT_DEFAULT_BUDGET = 50
 
 ROOT_URLCONF = 'rankme.urls'
 
@@ -139,6 +164,7 @@ INSTALLED_APPS = (
     'apps.slack',
     'apps.api',
     'apps.timeline',
+    'apps.live',
     'django.contrib.admin',
     'django.contrib.admindocs',
     'social.apps.django_app.default',
@@ -206,6 +232,41 @@ LOGIN_URL = '/login/twitter/'
 
 GAME_INITIAL_MU = 25
 GAME_INITIAL_SIGMA = 8.333
+# Number of standard deviations subtracted from the skill of the players in
+# the competitions ranked by conservative skill
+CONSERVATIVE_RATING_FACTOR = 3
+# Number of games between two snapshots of the ratings of a competition
+RATING_CHECKPOINT_INTERVAL = 1000
+# Maximum number of games rated in a single transaction, and number of seconds
+# between two polls of the score_games command, for the competitions with
+# deferred scoring
+SCORING_BATCH_SIZE = 50
+SCORING_POLL_INTERVAL = 1
+
+# Number of players shown above and below the current user in the "around
+# me" leaderboard
+LEADERBOARD_AROUND_SIZE = 3
+
+# Number of latest games the rating trend of the players is computed over, and
+# number of seconds their cross-competition overview is cached
+PLAYER_SUMMARY_TREND_SIZE = 10
+PLAYER_SUMMARY_CACHE_TIMEOUT = 60
+
+# Maximum number of games the delta-sync API sends before asking the client to
+# fetch the whole leaderboard again
+DELTA_SYNC_MAX_GAMES = 100
+
+# Live events broadcaster. The default one dispatches events across processes
+# through Postgres, apps.live.broadcast.LocalBroadcaster only dispatches them
+# in the current process
+LIVE_BROADCASTER = get_env_variable('LIVE_BROADCASTER',
+                                    'apps.live.broadcast.PostgresBroadcaster')
+LIVE_KEEPALIVE_INTERVAL = 15
+LIVE_SUBSCRIBER_QUEUE_SIZE = 100
+# Number of seconds the Postgres broadcaster waits before reconnecting its
+# listener, doubled after each failed attempt up to the maximum
+LIVE_LISTENER_RETRY_DELAY = 1
+LIVE_LISTENER_MAX_RETRY_DELAY = 60
 
 SLACK_CHANNEL = '#rankme'
 SLACK_API_TOKEN = get_env_variable('SLACK_API_TOKEN', '')
@@ -217,11 +278,27 @@ REST_FRAMEWORK = {
     'DEFAULT_MODEL_SERIALIZER_CLASS': 'rest_framework.serializers.HyperlinkedModelSerializer',
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
-    'PAGINATE_BY': 10,
-    'PAGINATE_BY_PARAM': 'per_page'
+    'DEFAULT_PAGINATION_CLASS': 'apps.api.pagination.IdCursorPagination',
+    'PAGE_SIZE': 10,
+}
+
+# Number of seconds resolved API tokens are kept in the cache
+API_TOKEN_CACHE_TIMEOUT = 300
+
+# The cache needs to be shared by processes for cached API tokens, primary
+# pins and prediction versions to be invalidated everywhere, and to live in
+# memory for them not to cost a database query (see apps.api.checks)
+CACHES = {
+    'default': {
+        'BACKEND': get_env_variable(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': get_env_variable('CACHE_LOCATION', '127.0.0.1:11211'),
+    }
 }
 
 MESSAGE_TAGS = {
@@ -49,3 +49,11 @@ LOGGING = {
 }
 
 SLACK_DEBUG = True
+
+# The development server runs in a single process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+SILENCED_SYSTEM_CHECKS = ['api.E001']
@@ -2,6 +2,18 @@ from .base import *
 
 DEBUG = False
 
+# Stands in for the replica in the router tests, which enable it with the
+# REPLICA_DATABASE setting
+DATABASES['replica'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+
+# The tests run in a single process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+SILENCED_SYSTEM_CHECKS = ['api.E001']
+
 SLACK_API_TOKEN = 'notsotoken'
 SLACK_DEBUG = False
 
@@ -1,10 +1,10 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 
 import mock
 
 
 # TODO: this should really be moved to a separate tests utils package
-class RankMeTestCase(TestCase):
+class SlackMockMixin:
     def setUp(self):
         self.patcher = mock.patch('apps.slack.Slacker')
         self.mock_slacker = self.patcher.start()
@@ -13,3 +13,11 @@ class RankMeTestCase(TestCase):
     def tearDown(self):
         self.patcher.stop()
         super().tearDown()
+
+
+class RankMeTestCase(SlackMockMixin, TestCase):
+    pass
+
+
+class RankMeTransactionTestCase(SlackMockMixin, TransactionTestCase):
+    pass
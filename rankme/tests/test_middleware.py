@@ -0,0 +1,60 @@
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+
+import mock
+
+from apps.game.tests.factories import CompetitionFactory, UserFactory
+from rankme.middleware import get_query_shape, query_stats
+
+from . import RankMeTestCase
+
+
+@override_settings(QUERY_INSTRUMENTATION_ENABLED=True,
+                   QUERY_COUNT_DEFAULT_BUDGET=None)
+class QueryInstrumentationMiddlewareTestCase(RankMeTestCase):
+    def setUp(self):
+        super().setUp()
+        query_stats.reset()
+
+        self.user = UserFactory()
+        self.competition = CompetitionFactory(creator=self.user)
+        self.client.login(username=self.user.username, password='password')
+
+    def test_query_shape_strips_literals(self):
+        self.assertEqual(
+            get_query_shape("SELECT * FROM score WHERE id = 12 AND name = 'a'"),
+            get_query_shape("SELECT * FROM score WHERE id = 3 AND name = 'b'")
+        )
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse('competition_detail', kwargs={
+            'competition_slug': self.competition.slug
+        }))
+
+        stats = query_stats.get_stats()
+        self.assertIn('competition_detail', stats)
+        self.assertEqual(stats['competition_detail']['requests'], 1)
+        self.assertGreater(stats['competition_detail']['queries']['p50'], 0)
+
+    def test_view_over_budget_logs_warning(self):
+        with override_settings(QUERY_COUNT_BUDGETS={'competition_detail': 0}):
+            self.client = self.client_class()
+            self.client.login(username=self.user.username,
+                              password='password')
+
+            with mock.patch('rankme.middleware.logger') as logger:
+                self.client.get(reverse('competition_detail', kwargs={
+                    'competition_slug': self.competition.slug
+                }))
+
+        self.assertTrue(logger.warning.called)
+
+    def test_stats_endpoint_is_staff_only(self):
+        response = self.client.get(reverse('query_stats_detail'))
+        self.assertEqual(response.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get(reverse('query_stats_detail'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,81 @@
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.game.models import Game, PlayerSummary
+from apps.game.tests.factories import CompetitionFactory, UserFactory
+from rankme.routers import ReplicaRouter, replica_reads
+
+from . import RankMeTransactionTestCase
+
+
+# The replica is a test mirror of the default database, so a transaction test
+# case is needed for it to see the data
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRouterTestCase(RankMeTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+        self.router = ReplicaRouter()
+        self.user = UserFactory()
+        self.competition = CompetitionFactory(creator=self.user)
+        self.players = [UserFactory() for _ in range(2)]
+        self.competition.players.add(*self.players)
+        self.client.login(username=self.user.username, password='password')
+
+    def get_replica_queries(self, url):
+        with CaptureQueriesContext(connections['replica']) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+        return context.captured_queries
+
+    def test_reads_go_to_the_replica_only_when_enabled(self):
+        self.assertEqual(self.router.db_for_read(Game), 'default')
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Game), 'replica')
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+            self.assertEqual(self.router.db_for_write(Game), 'default')
+
+    def test_api_list_reads_from_the_replica(self):
+        self.competition.add_game(*self.players)
+
+        self.assertTrue(self.get_replica_queries(reverse('game-list')))
+
+    def test_score_chart_reads_from_the_replica(self):
+        self.competition.add_game(*self.players)
+
+        self.assertTrue(self.get_replica_queries(reverse(
+            'competition_detail_score_chart',
+            kwargs={'competition_slug': self.competition.slug}
+        )))
+
+    def test_reads_go_to_the_primary_after_announcing_a_game(self):
+        response = self.client.post(reverse('game-list'), {
+            'winner_id': self.players[0].id,
+            'loser_id': self.players[1].id,
+            'competition_id': self.competition.id,
+        })
+        self.assertEqual(response.status_code, 201)
+
+        self.assertFalse(self.get_replica_queries(reverse('game-list')))
+
+    def test_missing_summary_is_rebuilt_from_the_primary(self):
+        self.competition.add_game(*self.players)
+        PlayerSummary.objects.all().delete()
+
+        with replica_reads(), \
+                CaptureQueriesContext(connections['replica']) as context:
+            summary, rebuilt = PlayerSummary.objects.get_or_rebuild(
+                self.players[0].id
+            )
+
+        self.assertTrue(rebuilt)
+        self.assertEqual(summary.wins, 1)
+        # Only the lookup of the summary went to the replica
+        self.assertEqual(len(context.captured_queries), 1)
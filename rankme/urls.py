@@ -6,14 +6,20 @@ import social.apps.django_app.urls
 
 from apps.timeline import views as timeline_views
 from apps.game import urls as game_urls
+from apps.live import urls as live_urls
 from apps.api import urls as api_urls
 from apps.user import urls as user_urls
 
+from . import views
+
 admin.autodiscover()
 
 urlpatterns = [
+    url(r'^admin/query-stats/$', views.query_stats_detail,
+        name='query_stats_detail'),
     url(r'^admin/', include(admin.site.urls)),
     url(r'^$', timeline_views.index, name='homepage'),
+    url(r'', include(live_urls)),
     url(r'', include(game_urls)),
     url(r'', include(api_urls)),
     url(r'^profile/', include(user_urls)),
@@ -0,0 +1,16 @@
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http.response import HttpResponse
+
+from .middleware import query_stats
+
+
+@staff_member_required
+def query_stats_detail(request):
+    """
+    Return the rolling per-view SQL statistics recorded by the
+    ``QueryInstrumentationMiddleware``.
+    """
+    return HttpResponse(json.dumps(query_stats.get_stats()),
+                        content_type='application/json')